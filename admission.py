@@ -0,0 +1,126 @@
+"""Admission control by endpoint class.
+
+Every request is put in a class (cheap reads, search, writes, admin, auth)
+by a classify() function. A class runs at most `limit` requests at once in
+this worker; up to `queue` more wait at most `queue_timeout` seconds for a
+slot, and anything beyond that is refused straight away with 503 and
+``Retry-After``, before any work is done. A burst in one class therefore
+can't take the threads another class needs. Requests classified as None
+(health checks, long-lived streams) are never held back.
+
+Each class also carries a statement timeout, exposed to the request as
+``g.statement_timeout_ms`` for the database layer to apply.
+"""
+
+import threading
+import time
+
+from flask import g, jsonify
+
+
+class AdmissionClass:
+    """Concurrency limit with a short bounded FIFO-ish queue"""
+
+    def __init__(self, name, limit, queue=0, queue_timeout=0.5, statement_timeout_ms=0):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.queue_timeouts = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room; False means shed"""
+        started = time.perf_counter()
+        with self._cond:
+            # Arrivals don't overtake requests already waiting
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.queue:
+                self.shed += 1
+                return False
+
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    remaining = started + self.queue_timeout - time.perf_counter()
+                    if remaining <= 0:
+                        self.shed += 1
+                        self.queue_timeouts += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            self.queued += 1
+            waited = time.perf_counter() - started
+            self.queue_seconds += waited
+            self.max_queue_seconds = max(self.max_queue_seconds, waited)
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'queue': self.queue,
+            'statement_timeout_ms': self.statement_timeout_ms,
+            'active': self.active,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'shed': self.shed,
+            'queue_timeouts': self.queue_timeouts,
+            'avg_queue_ms': round(self.queue_seconds / self.queued * 1000, 2) if self.queued else 0.0,
+            'max_queue_ms': round(self.max_queue_seconds * 1000, 2),
+        }
+
+
+def parse_classes(spec, queue_timeout=0.5):
+    """AdmissionClasses from 'name=limit/queue/statement_timeout_ms,...'"""
+    classes = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, values = entry.partition('=')
+        limit, queue, statement_timeout_ms = (int(value) for value in values.split('/'))
+        classes[name.strip()] = AdmissionClass(name.strip(), limit, queue, queue_timeout, statement_timeout_ms)
+    return classes
+
+
+def init_admission(app, classes, classify, retry_after=1):
+    """Admit each request through its class; installs nothing if there are no classes"""
+    if not classes:
+        return
+
+    @app.before_request
+    def _admit():
+        admission = classes.get(classify())
+        if admission is None:
+            return None
+        if not admission.acquire():
+            response = jsonify({'message': 'Server busy, try again shortly', 'class': admission.name})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        g.admission = admission
+        g.statement_timeout_ms = admission.statement_timeout_ms
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        admission = g.pop('admission', None)
+        if admission is not None:
+            admission.release()
@@ -0,0 +1,111 @@
+"""In-memory manifest for serving the React production build.
+
+The build directory is scanned once at startup. Every file gets a precomputed
+ETag and headers, and compressible files are gzip (and, when the optional
+``brotli`` package is installed, brotli) compressed once and kept in memory.
+Requests for known paths are answered from the manifest without touching the
+filesystem; large binary files are streamed with ``wsgi.file_wrapper`` so
+servers such as gunicorn can use ``sendfile``.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, request
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Hashed bundles produced by react-scripts live under static/
+IMMUTABLE_PREFIX = 'static/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SHORT_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/manifest+json', 'image/svg+xml', 'application/xml')
+
+# Files above this size are streamed from disk instead of being held in memory
+MAX_IN_MEMORY_BYTES = 512 * 1024
+
+# Each encoding is a different representation, so it gets its own ETag
+ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+
+class Asset:
+    """One file from the build directory and its prepared variants"""
+
+    def __init__(self, rel_path, abs_path, data, content_type):
+        self.rel_path = rel_path
+        self.abs_path = abs_path
+        self.size = len(data)
+        self.content_type = content_type
+        self.etag = hashlib.blake2b(data, digest_size=12).hexdigest()
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if rel_path.startswith(IMMUTABLE_PREFIX) else SHORT_CACHE_CONTROL
+        self.data = data if self.size <= MAX_IN_MEMORY_BYTES else None
+        self.encoded = {}
+
+        if content_type.startswith(COMPRESSIBLE_TYPES) and self.size > 1024:
+            if brotli is not None:
+                self._add_encoding('br', brotli.compress(data, quality=11))
+            self._add_encoding('gzip', gzip.compress(data, compresslevel=9, mtime=0))
+
+    def _add_encoding(self, encoding, body):
+        if len(body) < self.size:
+            self.encoded[encoding] = body
+
+
+class AssetManifest:
+    """Path -> Asset map for a static build directory"""
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+
+    def build(self):
+        assets = {}
+        if self.root and os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    abs_path = os.path.join(dirpath, filename)
+                    rel_path = os.path.relpath(abs_path, self.root).replace(os.sep, '/')
+                    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    if content_type.startswith('text/') or content_type == 'application/javascript':
+                        content_type += '; charset=utf-8'
+                    with open(abs_path, 'rb') as f:
+                        data = f.read()
+                    assets[rel_path] = Asset(rel_path, abs_path, data, content_type)
+        self.assets = assets
+        return self
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def response(self, asset):
+        """Build the response for an asset, honouring If-None-Match and Accept-Encoding"""
+        encoding = next((encoding for encoding in ('br', 'gzip')
+                         if encoding in asset.encoded and encoding in request.accept_encodings), None)
+        etag = asset.etag + ETAG_SUFFIXES[encoding] if encoding else asset.etag
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': asset.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            return Response(asset.encoded[encoding], content_type=asset.content_type, headers=headers)
+
+        if asset.data is not None:
+            return Response(asset.data, content_type=asset.content_type, headers=headers)
+
+        # Large file: let the WSGI server sendfile it
+        headers['Content-Length'] = str(asset.size)
+        body = wrap_file(request.environ, open(asset.abs_path, 'rb'))
+        return Response(body, content_type=asset.content_type, headers=headers, direct_passthrough=True)
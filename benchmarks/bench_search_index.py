@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""In-memory search index benchmark: memory per million products and queries per second.
+
+Products are synthetic (random names, tags and descriptions drawn from a fixed
+vocabulary), so no database is needed.
+
+    python benchmarks/bench_search_index.py --products 200000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex  # noqa: E402
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ten', 'ro', 'sa', 'vi', 'ne', 'dor', 'pa', 'qui', 'zu', 'fe', 'bri', 'tas']
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_product(vocabulary, rng):
+    name = ' '.join(rng.choices(vocabulary, k=rng.randint(2, 5)))
+    tags = ','.join(rng.choices(vocabulary, k=rng.randint(2, 6)))
+    description = ' '.join(rng.choices(vocabulary, k=rng.randint(8, 30)))
+    return name, tags, description
+
+
+def make_query(vocabulary, rng):
+    words = rng.choices(vocabulary, k=rng.randint(1, 2))
+    kind = rng.random()
+    if kind < 0.2:
+        # typo: drop one character
+        i = rng.randrange(len(words[0]))
+        words[0] = words[0][:i] + words[0][i + 1:]
+    elif kind < 0.4:
+        # as-you-type prefix on the last word
+        words[-1] = words[-1][:max(2, len(words[-1]) // 2)]
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+
+    index = SearchIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for product_id in range(1, args.products + 1):
+        index.add(product_id, *make_product(vocabulary, rng))
+    build_seconds = time.perf_counter() - started
+    # Measure what the index holds, not the peak from generating products
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    queries = [make_query(vocabulary, rng) for _ in range(args.queries)]
+    started = time.perf_counter()
+    hits = 0
+    for query in queries:
+        hits += bool(index.search(query, limit=100))
+    query_seconds = time.perf_counter() - started
+
+    stats = index.stats()
+    print(f"products:            {stats['documents']}")
+    print(f"terms / postings:    {stats['terms']} / {stats['postings']}")
+    print(f"build:               {build_seconds:.1f}s ({args.products / build_seconds:,.0f} products/s)")
+    print(f"memory:              {index_bytes / 2**20:,.1f} MiB")
+    print(f"memory per 1M:       {index_bytes / args.products * 1e6 / 2**30:,.2f} GiB (extrapolated)")
+    print(f"queries per second:  {args.queries / query_seconds:,.0f} ({hits / args.queries:.0%} with results)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Worker startup benchmark: import plus create_app() time, then first-request latency.
+
+Each run happens in a fresh interpreter so nothing is cached between runs.
+
+    python benchmarks/bench_startup.py --runs 10 --path /health
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import app as catalog
+application = catalog.create_app()
+t1 = time.perf_counter()
+client = application.test_client()
+status = client.get(sys.argv[1]).status_code
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_request_ms": (t2 - t1) * 1000, "status": status,
+                  "flask_migrate_loaded": "flask_migrate" in sys.modules, "dotenv_loaded": "dotenv" in sys.modules}))
+'''
+
+
+def run_once(path):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, path],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/health', help='route used for the first request')
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+    for key in ('import_ms', 'first_request_ms'):
+        values = [r[key] for r in results]
+        print(f"{key:>18}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"{'status':>18}: {results[-1]['status']}")
+    print(f"{'flask_migrate':>18}: {'imported' if results[-1]['flask_migrate_loaded'] else 'not imported'}")
+    print(f"{'dotenv':>18}: {'imported' if results[-1]['dotenv_loaded'] else 'not imported'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""Byte-bounded LRU cache for serialized JSON responses, single-flight
+coalescing of identical misses, and the listener side of the cross-worker
+invalidation bus."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app
+
+
+class ResultCache:
+    """Thread-safe LRU of key -> bytes, bounded by the total size of the values.
+
+    Every discard() or clear() bumps `sequence`. A miss reads it before
+    computing and passes it to set(), which then drops the body if anything
+    was invalidated meanwhile: the body may predate that write, and its key
+    wasn't in the cache yet to be evicted.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_sets = 0
+        self.sequence = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key, body, sequence=None):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if sequence is not None and sequence != self.sequence:
+                self.stale_sets += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = body
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def discard(self, predicate):
+        """Drop every entry whose key matches predicate(key)"""
+        with self._lock:
+            self.sequence += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                self.current_bytes -= len(self._entries.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self.sequence += 1
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'stale_sets': self.stale_sets,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class _Flight:
+    __slots__ = ('done', 'body')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical computations within this worker.
+
+    The first caller for a key (the leader) runs the computation; callers
+    that arrive while it is running wait up to `timeout` seconds and share its
+    result. If the leader fails, produces nothing shareable or takes too long,
+    followers run the computation themselves.
+    """
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute):
+        """compute() returns (body, result); returns (body, result, shared).
+
+        body must be bytes (or None if not shareable); followers get
+        (body, None, True).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+
+        if not leader:
+            finished = flight.done.wait(self.timeout)
+            if finished and flight.body is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return flight.body, None, True
+            if not finished:
+                with self._lock:
+                    self.timeouts += 1
+            body, result = compute()
+            return body, result, False
+
+        try:
+            body, result = compute()
+            flight.body = body
+            return body, result, False
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        return {
+            'in_flight': len(self._flights),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+        }
+
+
+def cached_response(key_func):
+    """Serve a view's 200 JSON body from the app's result cache.
+
+    key_func() builds the cache key from the current request; returning None
+    bypasses the cache for that request. On a miss, concurrent requests with
+    the same key share one computation through the app's SingleFlight.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = current_app.extensions.get('result_cache')
+            flights = current_app.extensions.get('single_flight')
+            key = key_func() if cache is not None or flights is not None else None
+            if key is None:
+                return f(*args, **kwargs)
+
+            body = cache.get(key) if cache is not None else None
+            if body is not None:
+                response = Response(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            def compute():
+                sequence = cache.sequence if cache is not None else None
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return None, response
+                body = response.get_data()
+                # Store before the flight ends so late arrivals hit instead of leading again
+                if cache is not None:
+                    cache.set(key, body, sequence)
+                return body, response
+
+            if flights is not None:
+                body, response, shared = flights.do(key, compute)
+            else:
+                (body, response), shared = compute(), False
+            if shared:
+                response = Response(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'COALESCED'
+                return response
+
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
+
+
+# Cache keys are (endpoint, token, ...). While the invalidation listener is
+# connected the token is LIVE and entries live until a notification evicts
+# them; otherwise it is the catalog generation read from the database.
+LIVE = 'live'
+
+
+class CacheInvalidator:
+    """Evicts ResultCache entries named by catalog_changes notifications.
+
+    dependencies maps an entity type to the endpoints whose entries any
+    change to it invalidates; keyed maps an endpoint to the entity type whose
+    id is the third element of its keys, so those entries are evicted one id
+    at a time. Notifications missed while disconnected can't be replayed, so
+    on reconnect LIVE entries are dropped unless the catalog generation hasn't
+    moved since the previous connect.
+    """
+
+    def __init__(self, cache, dependencies, keyed, load_generation):
+        self.cache = cache
+        self.dependencies = dependencies
+        self.keyed = keyed
+        self.load_generation = load_generation
+        self.live = False
+        self.generation = None
+        self.received = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+
+    def evict(self, changes):
+        wholesale = set()
+        ids = {}
+        for entity, entity_id in changes:
+            wholesale.update(self.dependencies.get(entity, ()))
+            ids.setdefault(entity, set()).add(entity_id)
+
+        def matches(key):
+            if key[0] in wholesale:
+                return True
+            entity = self.keyed.get(key[0])
+            return entity is not None and key[2] in ids.get(entity, ())
+        self.cache.discard(matches)
+
+    def handle(self, payload):
+        """Notification handler for the catalog_changes channel"""
+        message = json.loads(payload)
+        if message.get('all'):
+            self.cache.discard(lambda key: True)
+        else:
+            self.evict(message.get('changes', []))
+        self.received += 1
+        if message.get('sent_at'):
+            self.last_latency = max(0.0, time.time() - message['sent_at'])
+            self.max_latency = max(self.max_latency, self.last_latency)
+
+    def reconnected(self):
+        generation = self.load_generation()
+        if generation != self.generation:
+            self.cache.discard(lambda key: key[1] == LIVE)
+        self.generation = generation
+        self.live = True
+
+    def disconnected(self):
+        self.live = False
+
+    def stats(self):
+        return {
+            'live': self.live,
+            'notifications': self.received,
+            'last_latency_ms': round(self.last_latency * 1000, 2) if self.last_latency is not None else None,
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+        }
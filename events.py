@@ -0,0 +1,194 @@
+"""In-process event fan-out fed by Postgres LISTEN/NOTIFY.
+
+Writers call ``notify(session, channel, payload)`` before committing. On
+Postgres this is a ``pg_notify`` in the same transaction, so the message is
+delivered to every listening worker (this one included) only if the commit
+succeeds. On other databases it is dispatched locally after the commit.
+
+Each worker runs one ``NotificationListener`` thread holding a single
+LISTEN connection. It hands payloads to handlers, such as a ``Broadcaster``
+that fans events out to bounded per-subscriber queues.
+"""
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One consumer's bounded queue plus the filter it subscribed with"""
+
+    def __init__(self, maxsize, product_ids=None, category=None):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.product_ids = product_ids
+        self.category = category.lower() if category else None
+        self.overflowed = False
+
+    def wants(self, event):
+        if self.product_ids is not None and event.get('id') not in self.product_ids:
+            return False
+        if self.category is not None and (event.get('category') or '').lower() != self.category:
+            return False
+        return True
+
+
+class Broadcaster:
+    """Fan events out to subscribers without ever blocking the publisher"""
+
+    def __init__(self, queue_size=100, max_subscribers=None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, product_ids=None, category=None):
+        """A new subscription, or None if max_subscribers are already connected"""
+        subscription = Subscription(self.queue_size, product_ids, category)
+        with self._lock:
+            if self.max_subscribers and len(self._subscriptions) >= self.max_subscribers:
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.overflowed or not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: cut it off rather than buffer without bound
+                subscription.overflowed = True
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+
+class NotificationListener:
+    """Single background LISTEN connection dispatching to per-channel handlers"""
+
+    def __init__(self, engine, poll_interval=5.0):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.reconnect_handlers = []
+        self.disconnect_handlers = []
+        self.connected = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add_handler(self, channel, handler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler):
+        """Called after every (re)connect; notifications may have been missed"""
+        self.reconnect_handlers.append(handler)
+
+    def on_disconnect(self, handler):
+        """Called when the connection drops; nothing is delivered until the next reconnect"""
+        self.disconnect_handlers.append(handler)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-listener', daemon=True)
+                self._thread.start()
+
+    def dispatch(self, channel, payload):
+        for handler in self.handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("notification handler failed for %s", channel)
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("notification listener disconnected; retrying in %.0fs", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            else:
+                backoff = 1.0
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                for channel in self.handlers:
+                    cursor.execute(f'LISTEN "{channel}"')
+            for handler in self.reconnect_handlers:
+                handler()
+            self.connected = True
+            while True:
+                if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                    # Idle: make sure the connection is still there rather than silently dead
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                else:
+                    conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    self.dispatch(notification.channel, notification.payload)
+        finally:
+            if self.connected:
+                self.connected = False
+                for handler in self.disconnect_handlers:
+                    try:
+                        handler()
+                    except Exception:
+                        logger.exception("disconnect handler failed")
+            raw.invalidate()
+
+
+def notify(session, channel, payload):
+    """Queue a notification that is delivered only if the session commits"""
+    message = json.dumps(payload, separators=(',', ':'))
+    bind = session.get_bind()
+    if bind.dialect.name == 'postgresql':
+        session.execute(sa.text('SELECT pg_notify(:channel, :payload)'), {'channel': channel, 'payload': message})
+    else:
+        session.info.setdefault('pending_notifications', []).append((channel, message))
+
+
+def dispatch_pending(session, listener):
+    """after_commit hook for databases without LISTEN/NOTIFY"""
+    for channel, message in session.info.pop('pending_notifications', []):
+        listener.dispatch(channel, message)
+
+
+def discard_pending(session):
+    session.info.pop('pending_notifications', None)
+
+
+def sse_stream(broadcaster, subscription, heartbeat=15.0):
+    """Yield Server-Sent Events for a subscription until it overflows or disconnects"""
+    try:
+        yield 'retry: 3000\n\n'
+        while not subscription.overflowed:
+            try:
+                event = subscription.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield f"id: {event.get('cursor', '')}\nevent: {event['op']}\ndata: {json.dumps(event)}\n\n"
+        yield 'event: overflow\ndata: {}\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
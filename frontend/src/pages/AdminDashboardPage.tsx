@@ -1,22 +1,55 @@
 import React, { useState, useEffect } from 'react';
 import Layout from '../components/layout/Layout';
+import Pagination from '../components/products/Pagination';
 import { adminAPI } from '../services/api';
-import { User } from '../types';
+import { User, PaginationData, AdminStats } from '../types';
 
 const AdminDashboardPage: React.FC = () => {
   const [users, setUsers] = useState<User[]>([]);
+  const [pagination, setPagination] = useState<PaginationData>({
+    page: 1,
+    per_page: 20,
+    total: 0,
+    pages: 0,
+    has_prev: false,
+    has_next: false,
+    prev_num: 0,
+    next_num: 0,
+  });
+  const [searchQuery, setSearchQuery] = useState('');
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [stats, setStats] = useState<AdminStats | null>(null);
 
   useEffect(() => {
     fetchUsers();
+    fetchStats();
   }, []);
 
-  const fetchUsers = async () => {
+  const fetchStats = async () => {
+    try {
+      setStats(await adminAPI.getStats());
+    } catch (error: any) {
+      // The totals are informational; the rest of the dashboard works without them
+      console.error('Error fetching stats:', error);
+    }
+  };
+
+  const fetchUsers = async (page = 1, query = searchQuery) => {
     setLoading(true);
     try {
-      const data = await adminAPI.getUsers();
-      setUsers(data);
+      const params: Record<string, string> = {
+        page: page.toString(),
+        per_page: '20',
+      };
+
+      if (query) {
+        params.q = query;
+      }
+
+      const data = await adminAPI.getUsers(params);
+      setUsers(data.users);
+      setPagination(data.pagination);
       setError(null);
     } catch (error: any) {
       console.error('Error fetching users:', error);
@@ -26,6 +59,11 @@ const AdminDashboardPage: React.FC = () => {
     }
   };
 
+  const handleSearch = (e: React.FormEvent) => {
+    e.preventDefault();
+    fetchUsers(1, searchQuery);
+  };
+
   const handleRoleChange = async (userId: number, role: string) => {
     try {
       await adminAPI.updateUser(userId, { role });
@@ -54,11 +92,36 @@ const AdminDashboardPage: React.FC = () => {
     <Layout>
       <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-12">
         <h1 className="text-3xl font-bold text-gray-900 mb-6">Admin Dashboard</h1>
-        
+
+        {stats && (
+          <dl className="grid grid-cols-1 gap-5 sm:grid-cols-3 mb-8">
+            {[
+              { label: 'Users', value: stats.users.total, detail: `${stats.users.active} active` },
+              { label: 'Active Products', value: stats.products.active, detail: `${Object.keys(stats.categories).length} categories` },
+              { label: 'Inactive Products', value: stats.products.inactive, detail: `${stats.products.archived} archived` },
+            ].map(({ label, value, detail }) => (
+              <div key={label} className="bg-white shadow overflow-hidden sm:rounded-lg px-4 py-5 sm:p-6">
+                <dt className="text-sm font-medium text-gray-500 truncate">{label}</dt>
+                <dd className="mt-1 text-3xl font-semibold text-gray-900">{value.toLocaleString()}</dd>
+                <dd className="mt-1 text-sm text-gray-500">{detail}</dd>
+              </div>
+            ))}
+          </dl>
+        )}
+
         <div className="bg-white shadow overflow-hidden sm:rounded-lg mb-8">
           <div className="px-4 py-5 sm:px-6">
             <h2 className="text-lg leading-6 font-medium text-gray-900">User Management</h2>
             <p className="mt-1 max-w-2xl text-sm text-gray-500">Manage user roles and account status</p>
+            <form onSubmit={handleSearch} className="mt-4 max-w-md">
+              <input
+                type="text"
+                className="block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-primary-500 focus:border-primary-500 sm:text-sm"
+                placeholder="Search by username or email"
+                value={searchQuery}
+                onChange={(e) => setSearchQuery(e.target.value)}
+              />
+            </form>
           </div>
           
           {loading ? (
@@ -160,6 +223,11 @@ const AdminDashboardPage: React.FC = () => {
                   ))}
                 </tbody>
               </table>
+              {pagination.pages > 1 && (
+                <div className="px-4 py-4">
+                  <Pagination pagination={pagination} onPageChange={(page) => fetchUsers(page)} />
+                </div>
+              )}
             </div>
           )}
         </div>
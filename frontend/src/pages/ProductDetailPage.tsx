@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import Layout from '../components/layout/Layout';
+import ProductGrid from '../components/products/ProductGrid';
 import { productsAPI } from '../services/api';
 import { Product } from '../types';
 import { useAuth } from '../context/AuthContext';
@@ -24,6 +25,7 @@ const ProductDetailPage: React.FC = () => {
   const [deleteModalOpen, setDeleteModalOpen] = useState(false);
   const [deleting, setDeleting] = useState(false);
   const [deleteSuccess, setDeleteSuccess] = useState(false);
+  const [relatedProducts, setRelatedProducts] = useState<Product[]>([]);
   const { state } = useAuth();
   const navigate = useNavigate();
   const { user } = state;
@@ -52,6 +54,22 @@ const ProductDetailPage: React.FC = () => {
     fetchProduct();
   }, [id]);
 
+  useEffect(() => {
+    const fetchRelatedProducts = async () => {
+      if (!id) return;
+
+      setRelatedProducts([]);
+      try {
+        setRelatedProducts(await productsAPI.getRelatedProducts(parseInt(id), 4));
+      } catch (error: any) {
+        // Related products are optional; the page is complete without them
+        console.error('Error fetching related products:', error);
+      }
+    };
+
+    fetchRelatedProducts();
+  }, [id]);
+
   const handleDelete = async () => {
     if (!product) return;
     
@@ -289,6 +307,14 @@ const ProductDetailPage: React.FC = () => {
               </div>
             </div>
           </div>
+
+          {/* Related Products */}
+          {relatedProducts.length > 0 && (
+            <div className="mt-16">
+              <h2 className="text-2xl font-bold text-gray-900 mb-6">Related Products</h2>
+              <ProductGrid products={relatedProducts} />
+            </div>
+          )}
         </div>
       </div>
 
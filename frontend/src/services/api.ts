@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { User, Product, ProductsResponse, SearchResponse } from '../types';
+import { User, Product, ProductsResponse, SearchResponse, AdminStats } from '../types';
 
 const api = axios.create({
   baseURL: process.env.REACT_APP_API_URL || '',
@@ -96,6 +96,10 @@ export const productsAPI = {
     const response = await api.delete(`/products/${id}`);
     return response.data;
   },
+  getRelatedProducts: async (id: number, k = 10): Promise<Product[]> => {
+    const response = await api.get(`/products/${id}/related`, { params: { k } });
+    return response.data.related;
+  },
   getCategories: async (): Promise<string[]> => {
     const response = await api.get('/products/categories');
     return response.data.categories;
@@ -112,8 +116,8 @@ export const productsAPI = {
 
 // Admin API
 export const adminAPI = {
-  getUsers: async () => {
-    const response = await api.get('/admin/users');
+  getUsers: async (params?: any) => {
+    const response = await api.get('/admin/users', { params });
     return response.data;
   },
   updateUser: async (id: number, data: Partial<User>) => {
@@ -124,6 +128,10 @@ export const adminAPI = {
     const response = await api.get('/admin/products', { params });
     return response.data;
   },
+  getStats: async (): Promise<AdminStats> => {
+    const response = await api.get('/admin/stats');
+    return response.data;
+  },
 };
 
 export default api;
\ No newline at end of file
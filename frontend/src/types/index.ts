@@ -54,4 +54,17 @@ export interface SearchInfo {
 
 export interface SearchResponse extends ProductsResponse {
   search_info: SearchInfo;
+}
+
+export interface AdminStats {
+  users: {
+    total: number;
+    active: number;
+  };
+  products: {
+    active: number;
+    inactive: number;
+    archived: number;
+  };
+  categories: Record<string, number>;
 }
\ No newline at end of file
@@ -0,0 +1,8 @@
+# gunicorn reads this file from the working directory
+
+
+def post_worker_init(worker):
+    """Warm each worker up before it accepts connections (see warmup.py)"""
+    warm_up = worker.wsgi.extensions.get('warm_up') if hasattr(worker.wsgi, 'extensions') else None
+    if warm_up is not None:
+        warm_up.run()
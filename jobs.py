@@ -0,0 +1,188 @@
+"""Postgres-backed background jobs.
+
+Jobs are rows in ``catalog.jobs``. Workers claim the oldest runnable row with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of worker processes can
+poll the same table without a broker and without blocking each other. A
+failed job is retried with exponential backoff until ``max_attempts``; a job
+whose worker died is put back in the queue once its lock goes stale, or
+failed if that was its last attempt. Long handlers call context.progress()
+more often than the lock timeout to keep their lock.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class JobRegistry:
+    """Maps job kinds to handler functions taking a JobContext"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def job(self, kind):
+        def decorator(f):
+            self.handlers[kind] = f
+            return f
+        return decorator
+
+    def __contains__(self, kind):
+        return kind in self.handlers
+
+    def __getitem__(self, kind):
+        return self.handlers[kind]
+
+
+class JobContext:
+    """What a handler sees: its payload and a way to report progress"""
+
+    def __init__(self, worker, job):
+        self.worker = worker
+        self.job_id = job.id
+        self.payload = job.payload or {}
+
+    def progress(self, fraction, message=None):
+        """Record progress (0..1) in its own transaction; also refreshes the job's lock"""
+        self.worker.update(self.job_id, progress=max(0.0, min(1.0, float(fraction))),
+                           progress_message=message, locked_at=datetime.utcnow())
+
+
+class Worker:
+    """Claims and runs jobs until stopped; use inside an app context"""
+
+    def __init__(self, db, job_model, registry, poll_interval=2.0, lock_timeout=600):
+        self.db = db
+        self.Job = job_model
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        self._last_reap = 0.0
+
+    def update(self, job_id, **values):
+        table = self.Job.__table__
+        with self.db.engine.begin() as connection:
+            connection.execute(table.update().where(table.c.id == job_id).values(**values))
+
+    def claim(self):
+        Job = self.Job
+        now = datetime.utcnow()
+        job = Job.query.filter(
+            Job.status == 'queued', Job.run_after <= now
+        ).order_by(Job.run_after, Job.id).with_for_update(skip_locked=True).first()
+        if job is None:
+            self.db.session.rollback()
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_by = self.worker_id
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        self.db.session.commit()
+        return job
+
+    def reap(self):
+        """Requeue running jobs whose worker stopped refreshing the lock, or fail them on their last attempt"""
+        Job = self.Job
+        now = datetime.utcnow()
+        stale = (Job.status == 'running', Job.locked_at < now - timedelta(seconds=self.lock_timeout))
+        # A job that keeps killing its worker must not be retried forever
+        failed = Job.query.filter(*stale, Job.attempts >= Job.max_attempts).update(
+            {'status': 'failed', 'locked_by': None, 'locked_at': None, 'finished_at': now,
+             'error': 'Worker stopped responding while running the job (lock expired)'},
+            synchronize_session=False
+        )
+        requeued = Job.query.filter(*stale).update(
+            {'status': 'queued', 'locked_by': None, 'locked_at': None}, synchronize_session=False
+        )
+        self.db.session.commit()
+        if failed:
+            logger.error("failed %d stale jobs that used up their attempts", failed)
+        if requeued:
+            logger.warning("requeued %d stale jobs", requeued)
+
+    def run_job(self, job):
+        job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+        context = JobContext(self, job)
+        try:
+            result = self.registry[kind](context)
+        except Exception:
+            self.db.session.rollback()
+            error = traceback.format_exc(limit=20)
+            logger.exception("job %s (%s) failed on attempt %d", job_id, kind, attempts)
+            if attempts < max_attempts:
+                delay = min(2 ** attempts * 10, 3600)
+                self.update(job_id, status='queued', error=error, locked_by=None, locked_at=None,
+                            run_after=datetime.utcnow() + timedelta(seconds=delay))
+            else:
+                self.update(job_id, status='failed', error=error, finished_at=datetime.utcnow())
+            return False
+
+        self.db.session.commit()
+        self.update(job_id, status='succeeded', result=result, progress=1.0, error=None,
+                    finished_at=datetime.utcnow())
+        return True
+
+    def run_once(self):
+        """Run one job if one is ready; returns False when the queue was empty"""
+        if time.monotonic() - self._last_reap > 60:
+            self._last_reap = time.monotonic()
+            self.reap()
+        job = self.claim()
+        if job is None:
+            return False
+        if job.kind not in self.registry:
+            self.update(job.id, status='failed', error=f"Unknown job kind: {job.kind}",
+                        finished_at=datetime.utcnow())
+            return True
+        self.run_job(job)
+        return True
+
+    def run_forever(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        logger.info("worker %s started", self.worker_id)
+        while not self.stopping:
+            try:
+                ran = self.run_once()
+            except Exception:
+                logger.exception("worker loop error")
+                self.db.session.rollback()
+                ran = False
+            finally:
+                self.db.session.remove()
+            if not ran:
+                time.sleep(self.poll_interval)
+
+    def _stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
+
+
+def run_pool(target, processes):
+    """Run target() in `processes` forked children and wait for them"""
+    if processes <= 1:
+        target()
+        return
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=target, name=f'job-worker-{i}') for i in range(processes)]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
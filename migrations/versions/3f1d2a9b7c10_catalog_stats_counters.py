@@ -0,0 +1,57 @@
+"""catalog stats counters
+
+Revision ID: 3f1d2a9b7c10
+Revises: c7449a857464
+Create Date: 2026-10-19 10:02:11.418231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1d2a9b7c10'
+down_revision = 'c7449a857464'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stats',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'key'),
+    schema='catalog'
+    )
+
+    # Seed the counters from the existing rows; `flask reconcile-stats` recomputes them later
+    op.execute("""
+        INSERT INTO catalog.stats (scope, key, value)
+        SELECT 'products', CASE WHEN is_active IS NOT FALSE THEN 'active' ELSE 'inactive' END, count(*)
+        FROM catalog.products GROUP BY 2
+    """)
+    op.execute("""
+        INSERT INTO catalog.stats (scope, key, value)
+        SELECT 'category', category, count(*) FROM catalog.products
+        WHERE is_active IS NOT FALSE AND category IS NOT NULL AND category <> ''
+        GROUP BY category
+    """)
+    op.execute("""
+        INSERT INTO catalog.stats (scope, key, value)
+        SELECT 'user_products', created_by::text, count(*) FROM catalog.products
+        WHERE is_active IS NOT FALSE AND created_by IS NOT NULL
+        GROUP BY created_by
+    """)
+    op.execute("""
+        INSERT INTO catalog.stats (scope, key, value)
+        SELECT 'users', 'total', count(*) FROM catalog.user
+    """)
+    op.execute("""
+        INSERT INTO catalog.stats (scope, key, value)
+        SELECT 'users', 'active', count(*) FROM catalog.user WHERE is_active IS NOT FALSE
+    """)
+
+
+def downgrade():
+    op.drop_table('stats', schema='catalog')
@@ -0,0 +1,31 @@
+"""products change feed index
+
+Revision ID: 5b7c1e0a4d22
+Revises: 8a4e6c2d9f31
+Create Date: 2026-10-19 12:05:37.114082
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_migrations import autocommit, backfill, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7c1e0a4d22'
+down_revision = '8a4e6c2d9f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with autocommit() as connection:
+        # Rows without updated_at would never appear in the change feed
+        backfill(connection, 'products', 'updated_at = COALESCE(created_at, now())', where='updated_at IS NULL',
+                 name='products.updated_at')
+        create_index_concurrently(connection, 'ix_products_updated_at_id', 'products', ['updated_at', 'id'])
+
+
+def downgrade():
+    with autocommit() as connection:
+        drop_index_concurrently(connection, 'ix_products_updated_at_id')
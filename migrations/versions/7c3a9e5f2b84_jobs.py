@@ -0,0 +1,48 @@
+"""background jobs table
+
+Revision ID: 7c3a9e5f2b84
+Revises: d2e8f4a61b57
+Create Date: 2026-10-19 14:32:50.208716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3a9e5f2b84'
+down_revision = 'd2e8f4a61b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('progress_message', sa.String(length=255), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=255), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['catalog.user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='catalog'
+    )
+    op.create_index('ix_jobs_queued', 'jobs', ['run_after', 'id'], unique=False, schema='catalog',
+                    postgresql_where=sa.text("status = 'queued'"))
+
+
+def downgrade():
+    op.drop_index('ix_jobs_queued', table_name='jobs', schema='catalog')
+    op.drop_table('jobs', schema='catalog')
@@ -0,0 +1,32 @@
+"""user search indexes
+
+Revision ID: 8a4e6c2d9f31
+Revises: 3f1d2a9b7c10
+Create Date: 2026-10-19 11:20:43.907215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_migrations import autocommit, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6c2d9f31'
+down_revision = '3f1d2a9b7c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with autocommit() as connection:
+        create_index_concurrently(connection, 'ix_user_username_lower', 'user', ['lower(username) text_pattern_ops'])
+        create_index_concurrently(connection, 'ix_user_email_lower', 'user', ['lower(email) text_pattern_ops'])
+        create_index_concurrently(connection, 'ix_user_created_at', 'user', ['created_at'])
+
+
+def downgrade():
+    with autocommit() as connection:
+        drop_index_concurrently(connection, 'ix_user_created_at')
+        drop_index_concurrently(connection, 'ix_user_email_lower')
+        drop_index_concurrently(connection, 'ix_user_username_lower')
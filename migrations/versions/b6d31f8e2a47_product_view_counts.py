@@ -0,0 +1,47 @@
+"""product view counts and hourly view buckets
+
+Revision ID: b6d31f8e2a47
+Revises: e4b9a1c73d25
+Create Date: 2026-10-19 17:42:36.905118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_migrations import autocommit, create_index_concurrently, ddl_timeouts, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d31f8e2a47'
+down_revision = 'e4b9a1c73d25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    ddl_timeouts()
+    # Constant server default: no table rewrite on Postgres 11+
+    op.add_column('products', sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False),
+                  schema='catalog')
+    op.add_column('products_archive', sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False),
+                  schema='catalog')
+    op.create_table('product_views_hourly',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('views', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['catalog.products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'hour'),
+    schema='catalog'
+    )
+    op.create_index('ix_product_views_hourly_hour', 'product_views_hourly', ['hour'], unique=False, schema='catalog')
+    with autocommit() as connection:
+        create_index_concurrently(connection, 'ix_products_view_count', 'products', ['view_count'])
+
+
+def downgrade():
+    with autocommit() as connection:
+        drop_index_concurrently(connection, 'ix_products_view_count')
+    op.drop_index('ix_product_views_hourly_hour', table_name='product_views_hourly', schema='catalog')
+    op.drop_table('product_views_hourly', schema='catalog')
+    op.drop_column('products_archive', 'view_count', schema='catalog')
+    op.drop_column('products', 'view_count', schema='catalog')
@@ -0,0 +1,42 @@
+"""product related tables
+
+Revision ID: d2e8f4a61b57
+Revises: 5b7c1e0a4d22
+Create Date: 2026-10-19 13:41:09.553870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8f4a61b57'
+down_revision = '5b7c1e0a4d22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_related',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.SmallInteger(), nullable=False),
+    sa.Column('related_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['catalog.products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['related_id'], ['catalog.products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'rank'),
+    schema='catalog'
+    )
+    op.create_table('product_related_state',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.String(length=32), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['catalog.products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id'),
+    schema='catalog'
+    )
+
+
+def downgrade():
+    op.drop_table('product_related_state', schema='catalog')
+    op.drop_table('product_related', schema='catalog')
@@ -0,0 +1,46 @@
+"""products archive table and inactive-products index
+
+Revision ID: e4b9a1c73d25
+Revises: 7c3a9e5f2b84
+Create Date: 2026-10-19 16:05:12.481302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_migrations import autocommit, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9a1c73d25'
+down_revision = '7c3a9e5f2b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('products_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('tags', sa.String(length=500), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['catalog.user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='catalog'
+    )
+    with autocommit() as connection:
+        create_index_concurrently(connection, 'ix_products_inactive_updated_at', 'products', ['updated_at'],
+                                  where='is_active = false')
+
+
+def downgrade():
+    with autocommit() as connection:
+        drop_index_concurrently(connection, 'ix_products_inactive_updated_at')
+    op.drop_table('products_archive', schema='catalog')
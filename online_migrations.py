@@ -0,0 +1,204 @@
+"""Helpers for migrating large tables without blocking the app.
+
+A plain ``op.create_index`` or a single ``UPDATE`` over catalog.products
+holds locks for as long as the whole table takes, and every request that
+touches the table queues behind it. These helpers avoid that (Postgres; only
+``backfill`` also runs on SQLite, without the timeouts, for tests):
+
+- ``create_index_concurrently`` builds an index with ``CREATE INDEX
+  CONCURRENTLY``, which has to run outside a transaction. Re-running it skips
+  a valid index and replaces an invalid one left by an interrupted build.
+- ``backfill`` updates a table in primary-key ranges, one short transaction
+  per batch. Progress is saved in catalog.online_migration_progress, so an
+  interrupted backfill resumes where it stopped. It pauses between batches to
+  keep the load down, and halves the batch when a batch hits a timeout.
+- ``ddl_timeouts`` sets ``lock_timeout``/``statement_timeout`` for the
+  migration's own transaction. A DDL statement that can't get its lock then
+  fails fast, instead of waiting with every later query queued behind it.
+
+In a migration::
+
+    from online_migrations import autocommit, backfill, create_index_concurrently, ddl_timeouts
+
+    def upgrade():
+        ddl_timeouts()
+        op.add_column('products', sa.Column('tag_count', sa.Integer()), schema='catalog')
+        with autocommit() as connection:
+            backfill(connection, 'products', "tag_count = cardinality(string_to_array(tags, ','))",
+                     where="tag_count IS NULL", name='products.tag_count')
+            create_index_concurrently(connection, 'ix_products_tag_count', 'products', ['tag_count'])
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = 'catalog'
+LOCK_NOT_AVAILABLE = '55P03'  # lock_timeout
+QUERY_CANCELED = '57014'      # statement_timeout
+
+
+@contextmanager
+def autocommit():
+    """Inside an Alembic migration: commit what ran so far and give an autocommit connection"""
+    from alembic import op
+
+    with op.get_context().autocommit_block():
+        yield op.get_bind()
+
+
+def ddl_timeouts(lock_timeout='2s', statement_timeout='60s'):
+    """SET LOCAL both timeouts for the rest of the migration's transaction"""
+    from alembic import op
+
+    op.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    op.execute(f"SET LOCAL statement_timeout = '{statement_timeout}'")
+
+
+@contextmanager
+def session_timeouts(connection, lock_timeout='2s', statement_timeout='0'):
+    """Set both timeouts on an autocommit connection for the block, then restore them"""
+    if connection.dialect.name != 'postgresql':
+        yield
+        return
+    previous = {name: connection.exec_driver_sql(f'SHOW {name}').scalar()
+                for name in ('lock_timeout', 'statement_timeout')}
+    connection.exec_driver_sql(f"SET lock_timeout = '{lock_timeout}'")
+    connection.exec_driver_sql(f"SET statement_timeout = '{statement_timeout}'")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            connection.exec_driver_sql(f"SET {name} = '{value}'")
+
+
+def _pgcode(error):
+    return getattr(getattr(error, 'orig', None), 'pgcode', None)
+
+
+def _quote(connection, *names):
+    preparer = connection.dialect.identifier_preparer
+    return '.'.join(preparer.quote(name) for name in names)
+
+
+def index_state(connection, name, schema=SCHEMA):
+    """'valid', 'invalid' (an interrupted concurrent build) or None if there is no such index"""
+    valid = connection.execute(sa.text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE c.relname = :name AND n.nspname = :schema"
+    ), {'name': name, 'schema': schema}).scalar()
+    if valid is None:
+        return None
+    return 'valid' if valid else 'invalid'
+
+
+def create_index_concurrently(connection, name, table, columns, schema=SCHEMA, unique=False, where=None,
+                              lock_timeout='5s', attempts=5, retry_delay=5.0):
+    """CREATE INDEX CONCURRENTLY on an autocommit connection; columns are SQL expressions.
+
+    The build only briefly waits for locks at its start and end, and retries
+    (after dropping the invalid leftover) when lock_timeout runs out there.
+    """
+    for attempt in range(1, attempts + 1):
+        state = index_state(connection, name, schema)
+        if state == 'valid':
+            logger.info("index %s already exists", name)
+            return
+        if state == 'invalid':
+            drop_index_concurrently(connection, name, schema)
+
+        sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {_quote(connection, name)} "
+               f"ON {_quote(connection, schema, table)} ({', '.join(columns)})")
+        if where:
+            sql += f" WHERE {where}"
+        started = time.perf_counter()
+        try:
+            # No statement_timeout: the build itself may take long, without blocking anyone
+            with session_timeouts(connection, lock_timeout=lock_timeout, statement_timeout='0'):
+                connection.exec_driver_sql(sql)
+        except sa.exc.DBAPIError as error:
+            if _pgcode(error) != LOCK_NOT_AVAILABLE or attempt == attempts:
+                raise
+            logger.warning("index %s: lock timeout (attempt %d/%d), retrying", name, attempt, attempts)
+            time.sleep(retry_delay)
+            continue
+        logger.info("index %s built in %.1f s", name, time.perf_counter() - started)
+        return
+
+
+def drop_index_concurrently(connection, name, schema=SCHEMA, lock_timeout='5s'):
+    with session_timeouts(connection, lock_timeout=lock_timeout, statement_timeout='0'):
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(connection, schema, name)}")
+
+
+def _progress_table(connection, schema):
+    table = _quote(connection, schema, 'online_migration_progress')
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {table} (name text PRIMARY KEY, last_key bigint NOT NULL, "
+        f"rows bigint NOT NULL DEFAULT 0, updated_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    return table
+
+
+def backfill(connection, table, set_sql, where=None, name=None, key='id', schema=SCHEMA, batch_size=5000,
+             min_batch_size=100, duty_cycle=0.5, lock_timeout='2s', statement_timeout='10s', progress=None):
+    """UPDATE table SET set_sql [WHERE where] in key ranges, on an autocommit connection.
+
+    `where` should exclude rows already done (e.g. "new_col IS NULL"), so a
+    batch repeated after a crash is harmless. `name` identifies the backfill
+    for resuming (default schema.table). After each batch it sleeps long
+    enough that it works at most `duty_cycle` of the time. progress(done_key,
+    max_key, rows) is called after each batch. Returns the number of rows updated.
+    """
+    name = name or f"{schema}.{table}"
+    progress_table = _progress_table(connection, schema)
+    target, key_column = _quote(connection, schema, table), _quote(connection, key)
+
+    bounds = connection.exec_driver_sql(f"SELECT min({key_column}), max({key_column}) FROM {target}").one()
+    if bounds[0] is None:
+        return 0
+    resumed = connection.execute(sa.text(f"SELECT last_key, rows FROM {progress_table} WHERE name = :name"),
+                                 {'name': name}).one_or_none()
+    last_key, rows = (resumed[0], resumed[1]) if resumed else (bounds[0] - 1, 0)
+    max_key = bounds[1]  # rows inserted later get the new value from the app or a default
+    if resumed:
+        logger.info("backfill %s: resuming after %s=%s", name, key, last_key)
+
+    condition = f" AND ({where})" if where else ""
+    statement = sa.text(f"UPDATE {target} SET {set_sql} WHERE {key_column} > :low AND {key_column} <= :high{condition}")
+    save = sa.text(
+        f"INSERT INTO {progress_table} (name, last_key, rows) VALUES (:name, :last_key, :rows) "
+        f"ON CONFLICT (name) DO UPDATE SET last_key = excluded.last_key, rows = excluded.rows, "
+        f"updated_at = CURRENT_TIMESTAMP"
+    )
+
+    size = batch_size
+    with session_timeouts(connection, lock_timeout=lock_timeout, statement_timeout=statement_timeout):
+        while last_key < max_key:
+            high = min(last_key + size, max_key)
+            started = time.perf_counter()
+            try:
+                updated = connection.execute(statement, {'low': last_key, 'high': high}).rowcount
+            except sa.exc.DBAPIError as error:
+                if _pgcode(error) not in (LOCK_NOT_AVAILABLE, QUERY_CANCELED) or size <= min_batch_size:
+                    raise
+                size = max(min_batch_size, size // 2)
+                logger.warning("backfill %s: timeout at %s=%s, batch size now %d", name, key, last_key, size)
+                time.sleep(1.0)
+                continue
+            elapsed = time.perf_counter() - started
+
+            last_key, rows = high, rows + max(updated, 0)
+            connection.execute(save, {'name': name, 'last_key': last_key, 'rows': rows})
+            if progress:
+                progress(last_key, max_key, rows)
+            if duty_cycle < 1:
+                time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+
+    connection.execute(sa.text(f"DELETE FROM {progress_table} WHERE name = :name"), {'name': name})
+    logger.info("backfill %s: %d rows updated", name, rows)
+    return rows
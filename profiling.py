@@ -0,0 +1,219 @@
+"""On-demand request profiling.
+
+A request is profiled when it carries a valid token (``X-Profile`` header or
+``_profile`` query parameter, issued by ``POST /admin/profiles/token``) or is
+picked at random at ``PROFILE_SAMPLE_RATE``. cProfile runs for the whole
+request while a sampling thread records the request thread's stack every few
+milliseconds. Both results are written to a directory that keeps only the
+newest profiles: pstats for ``python -m pstats`` or snakeviz, and collapsed
+stacks for flamegraph.pl or speedscope. Nothing is hooked into the app unless
+``PROFILING_ENABLED`` is set.
+
+Only one request per process is profiled at a time: cProfile can't run on two
+threads at once (Python 3.12+ raises ``ValueError``), so a request that would
+be profiled while another one is is served unprofiled, with
+``X-Profile-Skipped: busy``.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_RE = re.compile(r'^[0-9]{13}-[0-9]+-[0-9a-f]{6}$')
+KINDS = {'pstats': '.pstats', 'collapsed': '.collapsed'}
+SAMPLE_INTERVAL = 0.005
+
+# Held while a request in this process is being profiled
+_profiling_lock = threading.Lock()
+
+
+class StackSampler:
+    """Counts one thread's call stacks, sampled from another thread"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format: 'root;child;leaf count' per line"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Directory of profiles that keeps only the newest max_profiles"""
+
+    def __init__(self, directory, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, meta, profile, sampler):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{int(time.time() * 1000):013d}-{os.getpid()}-{secrets.token_hex(3)}"
+        base = os.path.join(self.directory, profile_id)
+
+        profile.dump_stats(base + '.pstats.tmp')
+        os.replace(base + '.pstats.tmp', base + '.pstats')
+        with open(base + '.collapsed.tmp', 'w') as f:
+            f.write(sampler.collapsed())
+        os.replace(base + '.collapsed.tmp', base + '.collapsed')
+        # Metadata last: list() only shows profiles whose files are complete
+        with open(base + '.json.tmp', 'w') as f:
+            json.dump({'id': profile_id, **meta}, f)
+        os.replace(base + '.json.tmp', base + '.json')
+
+        self._trim()
+        return profile_id
+
+    def _trim(self):
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for suffix in ('.json', *KINDS.values()):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass  # another worker got there first
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json') and PROFILE_ID_RE.match(name[:-5]))
+
+    def list(self):
+        """Profile metadata, newest first"""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(os.path.join(self.directory, profile_id + '.json')) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id, kind):
+        """File for a profile, or None if the id or kind is unknown"""
+        if kind not in KINDS or not PROFILE_ID_RE.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + KINDS[kind])
+        return path if os.path.exists(path) else None
+
+
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt='request-profiling')
+
+
+def issue_token(secret_key, issued_by):
+    return _serializer(secret_key).dumps({'by': issued_by})
+
+
+def verify_token(secret_key, token, max_age):
+    try:
+        _serializer(secret_key).loads(token, max_age=max_age)
+        return True
+    except BadSignature:
+        return False
+
+
+def init_profiling(app, store):
+    """Profile requests that ask for it; installs nothing unless PROFILING_ENABLED"""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    token_max_age = app.config.get('PROFILE_TOKEN_MAX_AGE_SECONDS', 900)
+
+    @app.before_request
+    def _start_profiling():
+        token = request.headers.get('X-Profile') or request.args.get('_profile')
+        if token and verify_token(app.config['SECRET_KEY'], token, token_max_age):
+            reason = 'token'
+        elif sample_rate and random.random() < sample_rate:
+            reason = 'sampled'
+        else:
+            return
+        if not _profiling_lock.acquire(blocking=False):
+            g.profile_skipped = True
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # some other profiler is active in this process
+            _profiling_lock.release()
+            g.profile_skipped = True
+            return
+        sampler = StackSampler(threading.get_ident())
+        g.profiling = (reason, time.perf_counter(), profile, sampler)
+        sampler.start()
+
+    def _stop(profiling):
+        profiling[2].disable()
+        profiling[3].stop()
+        _profiling_lock.release()
+
+    @app.after_request
+    def _finish_profiling(response):
+        if g.pop('profile_skipped', False):
+            response.headers['X-Profile-Skipped'] = 'busy'
+        profiling = g.pop('profiling', None)
+        if profiling is None:
+            return response
+        reason, started, profile, sampler = profiling
+        _stop(profiling)
+        try:
+            profile_id = store.save({
+                'method': request.method,
+                'path': request.path,
+                'args': {key: value for key, value in request.args.items() if key != '_profile'},
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'reason': reason,
+                'samples': sum(sampler.stacks.values()),
+                'created_at': datetime.utcnow().isoformat(),
+            }, profile, sampler)
+            response.headers['X-Profile-Id'] = profile_id
+        except OSError:
+            logger.exception("could not save request profile")
+        return response
+
+    @app.teardown_request
+    def _abandon_profiling(exc):
+        # after_request didn't run (unhandled exception): stop without saving
+        profiling = g.pop('profiling', None)
+        if profiling is not None:
+            _stop(profiling)
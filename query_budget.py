@@ -0,0 +1,119 @@
+"""Per-route SQL query budgets.
+
+Views declare how many statements they may issue with ``@query_budget(n)``.
+``QueryRecorder`` captures statements through SQLAlchemy's
+``before_cursor_execute`` event and works as a context manager or decorator
+on its own. With ``ENFORCE_QUERY_BUDGETS`` set, every request to a budgeted
+view is recorded, and going over budget raises ``QueryBudgetExceeded``
+(listing the SQL) when ``TESTING`` is on, or logs a warning otherwise. When
+the setting is off nothing is registered, so there is no per-request cost.
+Statements executed with the ``uncounted`` execution option (session
+settings such as ``SET LOCAL statement_timeout``) are not counted.
+"""
+
+import logging
+import threading
+from contextlib import ContextDecorator
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, label, budget, statements):
+        self.label = label
+        self.budget = budget
+        self.statements = statements
+        listing = '\n'.join(f"  {i + 1}. {' '.join(statement.split())}" for i, statement in enumerate(statements))
+        super().__init__(f"{label} issued {len(statements)} queries (budget {budget}):\n{listing}")
+
+
+class QueryRecorder(ContextDecorator):
+    """Record SQL statements run on the given engines in this thread.
+
+        with QueryRecorder(db.engine, max_queries=2) as recorder:
+            client.get('/products')
+        recorder.statements  # ['SELECT ...', ...]
+    """
+
+    def __init__(self, *engines, max_queries=None, label='block'):
+        self.engines = engines
+        self.max_queries = max_queries
+        self.label = label
+        self.statements = []
+        self._thread = None
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread and not _uncounted(context):
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        self._thread = threading.get_ident()
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+        if exc_type is None and self.max_queries is not None and len(self.statements) > self.max_queries:
+            raise QueryBudgetExceeded(self.label, self.max_queries, self.statements)
+        return False
+
+
+def query_budget(max_queries):
+    """Declare the most SQL statements a view may issue per request"""
+    def decorator(f):
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+
+def view_budget(app, endpoint):
+    view = app.view_functions.get(endpoint)
+    while view is not None:
+        if hasattr(view, 'query_budget'):
+            return view.query_budget
+        view = getattr(view, '__wrapped__', None)
+    return None
+
+
+def _uncounted(context):
+    return context is not None and context.execution_options.get('uncounted', False)
+
+
+def _record_request_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and not _uncounted(context):
+        statements = g.get('query_budget_statements')
+        if statements is not None:
+            statements.append(statement)
+
+
+def init_query_budgets(app, engines):
+    """Enforce @query_budget on every request (only when ENFORCE_QUERY_BUDGETS is set)"""
+    if not app.config.get('ENFORCE_QUERY_BUDGETS'):
+        return
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _record_request_statement):
+            event.listen(engine, 'before_cursor_execute', _record_request_statement)
+
+    @app.before_request
+    def _start_recording():
+        if view_budget(current_app, request.endpoint) is not None:
+            g.query_budget_statements = []
+
+    @app.after_request
+    def _check_budget(response):
+        statements = g.pop('query_budget_statements', None)
+        if statements is None:
+            return response
+        budget = view_budget(current_app, request.endpoint)
+        if len(statements) > budget:
+            error = QueryBudgetExceeded(f"{request.method} {request.path}", budget, statements)
+            if current_app.testing:
+                raise error
+            logger.warning(str(error))
+        return response
@@ -0,0 +1,98 @@
+"""TF-IDF similarity for the related-products job.
+
+Pure computation on NumPy/SciPy; the database side lives in
+``flask compute-related``. Only that command imports this module, so the web
+workers never load NumPy or SciPy.
+"""
+
+import hashlib
+import math
+
+import numpy as np
+from scipy import sparse
+
+from search_index import tokenize
+
+# Term weights per field; tags and names say more about a product than prose does
+FIELD_WEIGHTS = (('name', 2.0), ('tags', 2.0), ('description', 1.0))
+
+# Final score = text cosine plus small bonuses for same category and similar price
+TEXT_WEIGHT = 0.75
+CATEGORY_WEIGHT = 0.15
+PRICE_WEIGHT = 0.10
+
+# Cosine neighbours considered per product before category/price re-ranking
+CANDIDATES = 50
+
+
+def text_signature(name, tags, description, category, price):
+    """Hash of everything the similarity depends on; unchanged hash = nothing to recompute"""
+    raw = '\x1f'.join(str(value) if value is not None else '' for value in (name, tags, description, category, price))
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def build_matrix(documents):
+    """L2-normalised TF-IDF CSR matrix, one row per (name, tags, description) document"""
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    data = []
+    for document in documents:
+        counts = {}
+        for (_, weight), text in zip(FIELD_WEIGHTS, document):
+            for token in tokenize(text):
+                term = vocabulary.setdefault(token, len(vocabulary))
+                counts[term] = counts.get(term, 0.0) + weight
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, max(len(vocabulary), 1)),
+    )
+
+    # Sublinear tf, smoothed idf
+    matrix.data = 1.0 + np.log(matrix.data)
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1.0
+    matrix = matrix.multiply(idf.astype(np.float32)).tocsr()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags((1.0 / norms).astype(np.float32)).dot(matrix).tocsr()
+
+
+def price_similarity(a, b):
+    """1 for equal prices, falling off with the log of the price ratio"""
+    if a is None or b is None or a <= 0 or b <= 0:
+        return 0.0
+    return 1.0 / (1.0 + abs(math.log(a / b)))
+
+
+def top_neighbours(matrix, categories, prices, rows, k=20, batch_size=256):
+    """Yield (row, [(neighbour_row, score), ...]) for each requested row, best first"""
+    transposed = matrix.T.tocsc()
+    rows = list(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        similarities = matrix[batch].dot(transposed).tocsr()
+        for position, row in enumerate(batch):
+            begin, end = similarities.indptr[position], similarities.indptr[position + 1]
+            columns = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            if len(columns) > CANDIDATES:
+                keep = np.argpartition(-scores, CANDIDATES)[:CANDIDATES]
+                columns, scores = columns[keep], scores[keep]
+
+            ranked = []
+            for column, cosine in zip(columns.tolist(), scores.tolist()):
+                if column == row:
+                    continue
+                score = TEXT_WEIGHT * cosine
+                if categories[row] and categories[row] == categories[column]:
+                    score += CATEGORY_WEIGHT
+                score += PRICE_WEIGHT * price_similarity(prices[row], prices[column])
+                ranked.append((column, score))
+            ranked.sort(key=lambda item: -item[1])
+            yield row, ranked[:k]
@@ -0,0 +1,243 @@
+"""Read-replica routing for the catalog database.
+
+Read-only endpoints are marked with ``@read_only``. While such a request is
+being handled, SELECTs issued through ``db.session`` go to one of the engines
+built from ``DATABASE_REPLICA_URLS`` (round-robin, skipping replicas that fail
+their health check, which runs on a background thread). Everything else - writes, flushes and reads that follow a
+recent write by the same client - stays on the primary.
+
+In snapshot mode (``CATALOG_SNAPSHOT``) every statement goes to the snapshot
+file instead, and the same one for the whole request even if it is swapped
+meanwhile.
+"""
+
+import itertools
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+# Cookie used to pin a client to the primary after it has written
+PRIMARY_PIN_COOKIE = 'catalog_primary_until'
+
+
+class Replica:
+    """A replica engine plus its last known health"""
+
+    def __init__(self, url, engine):
+        self.url = url
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = 0.0
+
+    def check(self):
+        """Run a trivial query; mark the replica down if it fails"""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(sa.text('SELECT 1'))
+            self.healthy = True
+        except sa.exc.SQLAlchemyError:
+            self.healthy = False
+        self.checked_at = time.monotonic()
+        return self.healthy
+
+
+class ReplicaRouter:
+    """Round-robin pool of replica engines, health-checked by a background thread"""
+
+    def __init__(self, urls, engine_options=None, check_interval=10.0):
+        engine_options = engine_options or {}
+        self.replicas = [Replica(url, sa.create_engine(url, **engine_options)) for url in urls]
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._checker_pid = None
+        for replica in self.replicas:
+            sa.event.listen(replica.engine, 'handle_error', self._on_error)
+
+    def _on_error(self, context):
+        # Lost or refused connections take the replica out until the next health check;
+        # statement errors (timeouts included) say nothing about the replica itself
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def _start_checker(self):
+        # A replica that hangs on connect must never stall a request, so requests only read
+        # the last result. One thread per process: a forked worker starts its own.
+        if self._checker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._checker_pid == os.getpid():
+                return
+            self._checker_pid = os.getpid()
+            threading.Thread(target=_check_replicas, args=(weakref.ref(self),),
+                             name='replica-health-check', daemon=True).start()
+
+    def pick(self):
+        """Return the next healthy replica engine, or None if none are usable"""
+        if not self.replicas:
+            return None
+        self._start_checker()
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica.engine
+        return None
+
+    def mark_down(self, engine):
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+
+    def status(self):
+        return [
+            {'url': replica.engine.url.render_as_string(hide_password=True), 'healthy': replica.healthy}
+            for replica in self.replicas
+        ]
+
+    def dispose(self, close=True):
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+
+def _check_replicas(router_ref):
+    """Health-check loop; holds the router weakly so it ends with the app"""
+    while True:
+        router = router_ref()
+        if router is None:
+            return
+        for replica in router.replicas:
+            replica.check()
+        interval = router.check_interval
+        del router
+        time.sleep(interval)
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs from read-only requests to a replica (or everything to a snapshot)"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        snapshot = current_app.extensions.get('catalog_snapshot') if has_app_context() else None
+        if bind is None and snapshot is not None:
+            if 'snapshot_engine' not in g:
+                g.snapshot_engine = snapshot.current_engine()
+            return g.snapshot_engine
+        if bind is None and not self._flushing and _wants_replica(clause):
+            engine = g.get('replica_engine')
+            if engine is None:
+                router = current_app.extensions.get('replica_router')
+                engine = router.pick() if router else None
+                g.replica_engine = engine or False
+            if engine:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _wants_replica(clause):
+    if not has_request_context() or not g.get('read_only'):
+        return False
+    if g.get('pinned_to_primary'):
+        return False
+    return clause is None or isinstance(clause, sa.sql.Select)
+
+
+def read_only(f):
+    """Mark a view as safe to serve from a replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_only = True
+        g.pinned_to_primary = _recently_wrote()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@contextmanager
+def on_primary():
+    """Send this request's reads inside the block to the primary, as if it were pinned"""
+    pinned = g.get('pinned_to_primary')
+    g.pinned_to_primary = True
+    try:
+        yield
+    finally:
+        g.pinned_to_primary = pinned
+
+
+def _recently_wrote():
+    """Read-your-writes: has this client written within the configured window?"""
+    pinned_until = request.cookies.get(PRIMARY_PIN_COOKIE)
+    if pinned_until:
+        try:
+            if float(pinned_until) > time.time():
+                return True
+        except ValueError:
+            pass
+
+    user_id = _optional_identity()
+    if user_id is not None:
+        recent = current_app.extensions.get('replica_recent_writers', {})
+        return recent.get(user_id, 0) > time.time()
+    return False
+
+
+def _optional_identity():
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def record_write(response):
+    """after_request hook: pin the writing client to the primary for a while"""
+    if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+        return response
+    if not current_app.extensions.get('replica_router'):
+        return response
+
+    window = current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+    pinned_until = time.time() + window
+    user_id = _optional_identity()
+    if user_id is not None:
+        recent = current_app.extensions.setdefault('replica_recent_writers', {})
+        recent[user_id] = pinned_until
+        # Keep the map from growing without bound
+        if len(recent) > 10000:
+            now = time.time()
+            for key in [k for k, until in recent.items() if until <= now]:
+                recent.pop(key, None)
+    response.set_cookie(PRIMARY_PIN_COOKIE, str(pinned_until), max_age=int(window) + 1,
+                        httponly=True, path='/', samesite='Lax')
+    return response
+
+
+def init_replicas(app, db):
+    """Build the replica router from app config and register the hooks"""
+    urls = [url.strip() for url in app.config.get('DATABASE_REPLICA_URLS', []) if url.strip()]
+    app.config.setdefault('REPLICA_READ_YOUR_WRITES_SECONDS', 5)
+    app.config.setdefault('REPLICA_HEALTH_CHECK_INTERVAL', 10)
+    if not urls:
+        return None
+
+    router = ReplicaRouter(
+        urls,
+        engine_options=app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        check_interval=float(app.config['REPLICA_HEALTH_CHECK_INTERVAL']),
+    )
+    app.extensions['replica_router'] = router
+    app.extensions['replica_recent_writers'] = {}
+    app.after_request(record_write)
+
+    @app.teardown_appcontext
+    def _forget_replica(exc):
+        g.pop('replica_engine', None)
+
+    return router
@@ -0,0 +1,269 @@
+"""Compact in-memory inverted index with BM25F ranking and typo tolerance.
+
+Documents are products with three fields (name, tags, description). Each
+document gets an internal number; postings are parallel ``array`` columns of
+document numbers and per-field term frequencies, so the index holds no
+per-posting Python objects. Updates tombstone the old document number and
+append a new one; ``compact()`` drops tombstones once they pile up.
+
+Query tokens match exactly, by prefix (the last token, for as-you-type) or
+within edit distance 1 (tokens of four or more characters). Every token must
+match; scores are summed across tokens.
+"""
+
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+FIELDS = ('name', 'tags', 'description')
+DEFAULT_BOOSTS = {'name': 3.0, 'tags': 2.0, 'description': 1.0}
+
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _deletes(term):
+    """All strings formed by deleting one character from term"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a, b):
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class Postings:
+    """Parallel arrays: document numbers and per-field term frequencies"""
+
+    __slots__ = ('docs', 'tf')
+
+    def __init__(self):
+        self.docs = array('I')
+        self.tf = tuple(array('B') for _ in FIELDS)
+
+    def append(self, docno, counts):
+        self.docs.append(docno)
+        for field_tf, count in zip(self.tf, counts):
+            field_tf.append(min(count, 255))
+
+
+class SearchIndex:
+    """Inverted index over products; thread-safe for one writer and many readers"""
+
+    def __init__(self, boosts=None, k1=1.2, b=0.75):
+        self.boosts = [float((boosts or DEFAULT_BOOSTS)[field]) for field in FIELDS]
+        self.k1 = k1
+        self.b = b
+        self.terms = {}                  # term -> Postings
+        self.deletes = {}                # one-deletion variant -> term, or tuple of terms
+        self.product_ids = array('i')    # docno -> product id
+        self.alive = bytearray()         # docno -> 1 if current
+        self.lengths = tuple(array('H') for _ in FIELDS)
+        self.total_lengths = [0] * len(FIELDS)
+        self.doc_by_product = {}         # product id -> current docno
+        self.stale = set()               # product ids to reload before the next search
+        self._sorted_terms = []
+        self._sorted_dirty = False
+        self._lock = threading.RLock()
+
+    # Writing
+
+    def add(self, product_id, name, tags, description):
+        """Index (or re-index) a product"""
+        fields = (tokenize(name), tokenize(tags), tokenize(description))
+        with self._lock:
+            self._remove(product_id)
+            docno = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.alive.append(1)
+            self.doc_by_product[product_id] = docno
+
+            counts = {}
+            for field_no, tokens in enumerate(fields):
+                self.lengths[field_no].append(min(len(tokens), 65535))
+                self.total_lengths[field_no] += len(tokens)
+                for token in tokens:
+                    per_field = counts.setdefault(token, [0] * len(FIELDS))
+                    per_field[field_no] += 1
+
+            for term, per_field in counts.items():
+                postings = self.terms.get(term)
+                if postings is None:
+                    postings = self.terms[term] = Postings()
+                    self._sorted_dirty = True
+                    self._index_deletes(term)
+                postings.append(docno, per_field)
+
+    def _index_deletes(self, term):
+        if len(term) < MIN_FUZZY_LENGTH:
+            return
+        # Most variants belong to a single term, so store a bare string until they don't
+        for variant in _deletes(term):
+            existing = self.deletes.get(variant)
+            if existing is None:
+                self.deletes[variant] = term
+            elif isinstance(existing, str):
+                if existing != term:
+                    self.deletes[variant] = (existing, term)
+            elif term not in existing:
+                self.deletes[variant] = existing + (term,)
+
+    def _variant_terms(self, variant):
+        terms = self.deletes.get(variant, ())
+        return (terms,) if isinstance(terms, str) else terms
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def _remove(self, product_id):
+        docno = self.doc_by_product.pop(product_id, None)
+        if docno is not None:
+            self.alive[docno] = 0
+            for field_no in range(len(FIELDS)):
+                self.total_lengths[field_no] -= self.lengths[field_no][docno]
+
+    def mark_stale(self, product_id):
+        """Schedule a product to be reloaded before the next search"""
+        self.stale.add(product_id)
+
+    def take_stale(self):
+        with self._lock:
+            stale, self.stale = self.stale, set()
+        return stale
+
+    def compact(self):
+        """Drop tombstoned documents and renumber the rest"""
+        with self._lock:
+            remap = array('i', [-1]) * len(self.product_ids)
+            next_docno = 0
+            for docno, alive in enumerate(self.alive):
+                if alive:
+                    remap[docno] = next_docno
+                    next_docno += 1
+
+            for term in list(self.terms):
+                old = self.terms[term]
+                new = Postings()
+                for i, docno in enumerate(old.docs):
+                    if remap[docno] >= 0:
+                        new.append(remap[docno], [field_tf[i] for field_tf in old.tf])
+                if new.docs:
+                    self.terms[term] = new
+                else:
+                    del self.terms[term]
+                    self._sorted_dirty = True
+
+            self.deletes = {}
+            for term in self.terms:
+                self._index_deletes(term)
+
+            keep = [docno for docno, alive in enumerate(self.alive) if alive]
+            self.product_ids = array('i', (self.product_ids[docno] for docno in keep))
+            self.lengths = tuple(array('H', (lengths[docno] for docno in keep)) for lengths in self.lengths)
+            self.alive = bytearray(b'\x01' * len(keep))
+            self.doc_by_product = {product_id: docno for docno, product_id in enumerate(self.product_ids)}
+
+    @property
+    def tombstones(self):
+        return len(self.alive) - len(self.doc_by_product)
+
+    # Reading
+
+    def _expand(self, token, allow_prefix):
+        """Index terms a query token matches, with a weight per match kind"""
+        expansions = {}
+        if token in self.terms:
+            expansions[token] = 1.0
+
+        if allow_prefix and len(token) >= MIN_PREFIX_LENGTH:
+            if self._sorted_dirty:
+                self._sorted_terms = sorted(self.terms)
+                self._sorted_dirty = False
+            i = bisect_left(self._sorted_terms, token)
+            end = min(len(self._sorted_terms), i + MAX_PREFIX_EXPANSIONS)
+            while i < end and self._sorted_terms[i].startswith(token):
+                expansions.setdefault(self._sorted_terms[i], PREFIX_WEIGHT)
+                i += 1
+
+        if len(token) >= MIN_FUZZY_LENGTH:
+            candidates = set(self._variant_terms(token))
+            for variant in _deletes(token):
+                if variant in self.terms:
+                    candidates.add(variant)
+                candidates.update(self._variant_terms(variant))
+            for term in candidates:
+                if term in self.terms and _within_one_edit(token, term):
+                    expansions.setdefault(term, FUZZY_WEIGHT)
+        return expansions
+
+    def search(self, query, limit=1000):
+        """Return up to limit (product_id, score) pairs, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            live_docs = len(self.doc_by_product)
+            if not live_docs:
+                return []
+            avg_lengths = [max(total / live_docs, 1.0) for total in self.total_lengths]
+
+            scores = None
+            for position, token in enumerate(tokens):
+                token_scores = {}
+                expansions = self._expand(token, allow_prefix=position == len(tokens) - 1)
+                for term, weight in expansions.items():
+                    postings = self.terms[term]
+                    idf = math.log(1 + (live_docs - len(postings.docs) + 0.5) / (len(postings.docs) + 0.5))
+                    for i, docno in enumerate(postings.docs):
+                        if not self.alive[docno]:
+                            continue
+                        # BM25F: length-normalised, boosted term frequency across fields
+                        tf = 0.0
+                        for field_no, field_tf in enumerate(postings.tf):
+                            if field_tf[i]:
+                                norm = 1 - self.b + self.b * self.lengths[field_no][docno] / avg_lengths[field_no]
+                                tf += self.boosts[field_no] * field_tf[i] / norm
+                        score = weight * idf * tf / (self.k1 + tf)
+                        if score > token_scores.get(docno, 0.0):
+                            token_scores[docno] = score
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {docno: score + token_scores[docno] for docno, score in scores.items() if docno in token_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [(self.product_ids[docno], score) for docno, score in ranked]
+
+    def stats(self):
+        return {
+            'documents': len(self.doc_by_product),
+            'tombstones': self.tombstones,
+            'terms': len(self.terms),
+            'postings': sum(len(postings.docs) for postings in self.terms.values()),
+        }
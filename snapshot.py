@@ -0,0 +1,172 @@
+"""Read-only catalog snapshots.
+
+A snapshot is a standalone SQLite file holding what the public read
+endpoints need, in the same tables as the catalog schema (without the schema
+name). build_snapshot() writes each snapshot to its own versioned file
+(``<path>.v<milliseconds>``) and then atomically repoints the symlink at
+``path`` to it, so readers see either the old snapshot or the new one, never
+a partial file. The newest few versions are kept for readers that haven't
+switched yet.
+
+CatalogSnapshot serves the file the symlink points to: connections are
+opened read-only and immutable with the file memory-mapped, and a new target
+is picked up within check_interval seconds. A target that can't be opened is
+logged and skipped, and the previous version keeps being served.
+"""
+
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+VERSION_RE = re.compile(r'\.v[0-9]{13}$')
+
+snapshot_info = sa.Table(
+    'snapshot_info', sa.MetaData(),
+    sa.Column('key', sa.String(50), primary_key=True),
+    sa.Column('value', sa.String(255), nullable=False),
+)
+
+
+def snapshot_engine(path, schema, readonly=True, mmap_size=256 * 1024 * 1024):
+    """SQLite engine for a snapshot file; tables in `schema` resolve to the file's own tables"""
+    if readonly:
+        url = f"sqlite:///file:{os.path.abspath(path)}?mode=ro&immutable=1&uri=true"
+    else:
+        url = f"sqlite:///{os.path.abspath(path)}"
+    engine = sa.create_engine(url)
+
+    @sa.event.listens_for(engine, 'connect')
+    def _configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+        cursor.close()
+
+    return engine.execution_options(schema_translate_map={schema: None})
+
+
+def build_snapshot(path, tables, schema, fill, info=None, keep=3):
+    """Write a snapshot of `tables` and point path at it; fill(connection) inserts the rows.
+
+    Returns the snapshot's info (created_at, format and anything in `info`).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    version_path = f"{path}.v{int(time.time() * 1000):013d}"
+    tmp_path = f"{version_path}.tmp"
+
+    info = {'format': str(FORMAT_VERSION), 'created_at': datetime.utcnow().isoformat(),
+            **{key: str(value) for key, value in (info or {}).items()}}
+    engine = snapshot_engine(tmp_path, schema, readonly=False)
+    try:
+        with engine.begin() as connection:
+            for table in tables:
+                table.create(connection)
+            snapshot_info.create(connection)
+            fill(connection)
+            connection.execute(snapshot_info.insert(), [{'key': key, 'value': value} for key, value in info.items()])
+        with engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+            connection.exec_driver_sql('VACUUM')
+    except BaseException:
+        engine.dispose()
+        os.remove(tmp_path)
+        raise
+    engine.dispose()
+
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, version_path)
+    link_path = f"{path}.{os.getpid()}.link"
+    os.symlink(os.path.basename(version_path), link_path)
+    os.replace(link_path, path)
+
+    versions = sorted(name for name in glob.glob(f"{glob.escape(path)}.v*") if VERSION_RE.search(name))
+    for old_version in versions[:max(0, len(versions) - keep)]:
+        os.remove(old_version)  # readers still on it keep their open connections
+    return info
+
+
+class CatalogSnapshot:
+    """The snapshot file at path, reopened whenever a new one replaces it"""
+
+    def __init__(self, path, schema, check_interval=2.0):
+        self.path = path
+        self.schema = schema
+        self.check_interval = check_interval
+        self.engine = None
+        self.target = None
+        self.info = {}
+        self.swaps = 0
+        self._identity = None
+        self._checked_at = 0.0
+        self._swap_handlers = []
+        self._lock = threading.Lock()
+        self._load()
+        if self.engine is None:
+            raise RuntimeError(f"catalog snapshot {path} could not be opened")
+
+    def on_swap(self, handler):
+        """Called after a new snapshot file is in use"""
+        self._swap_handlers.append(handler)
+
+    def current_engine(self):
+        """Engine for the newest snapshot; checks the file at most every check_interval seconds"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    self._checked_at = time.monotonic()
+                    if self._load():
+                        for handler in self._swap_handlers:
+                            handler()
+        return self.engine
+
+    def _load(self):
+        # Connect to the version itself, so new connections never open a later file by accident
+        target = os.path.realpath(self.path)
+        try:
+            stat = os.stat(target)
+        except FileNotFoundError:
+            logger.error("catalog snapshot %s is missing; still serving the previous one", self.path)
+            return False
+        identity = (target, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity == self._identity:
+            return False
+
+        engine = snapshot_engine(target, self.schema)
+        try:
+            with engine.connect() as connection:
+                info = dict(connection.execute(sa.select(snapshot_info.c.key, snapshot_info.c.value)).all())
+            if info.get('format') != str(FORMAT_VERSION):
+                raise ValueError(f"unsupported snapshot format {info.get('format')!r}")
+        except (sa.exc.DBAPIError, ValueError):
+            engine.dispose()
+            logger.exception("could not open catalog snapshot %s; still serving the previous one", target)
+            self._identity = identity  # don't retry the same broken file
+            return False
+
+        old, self.engine, self.info, self._identity = self.engine, engine, info, identity
+        self.target = target
+        if old is not None:
+            self.swaps += 1
+            # Idle connections close now; checked-out ones finish on the old file, then close
+            old.dispose()
+            logger.info("now serving catalog snapshot created %s", info.get('created_at'))
+        return True
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'file': self.target,
+            'created_at': self.info.get('created_at'),
+            'generation': self.info.get('generation'),
+            'swaps': self.swaps,
+        }
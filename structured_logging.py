@@ -0,0 +1,180 @@
+"""Structured JSON logging off the request path.
+
+Records are formatted as one JSON object per line in the thread that logs
+them, then handed to a bounded queue; a QueueListener thread (one per
+process, restarted after a fork) does the actual writing to stderr. When the
+queue is full, records are dropped and counted rather than blocking the
+request. Each record carries the request's id (the X-Request-ID header if
+the client sent a sane one, else a new one, echoed back on the response),
+method, path and endpoint. Below WARNING, records from endpoints listed in
+LOG_SAMPLE_RATES are kept for only that fraction of requests, decided once
+per request. Passwords, tokens, cookies and anything that looks like a JWT
+are redacted from messages and extra fields.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+REDACTED = '[REDACTED]'
+# Matched against whole segments of a snake_cased key: 'password_hash' and 'access_token' are
+# sensitive, 'passenger' and 'token_count' aren't
+SENSITIVE_KEY_RE = re.compile(
+    r'(?:^|_)(?:pass(?:word|wd)?|secret|authorization|cookies?|jwt|credentials?|api_?key)(?:_|$)'
+    r'|(?:^|_)tokens?$'
+)
+JWT_RE = re.compile(r'eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*')
+BEARER_RE = re.compile(r'(Bearer\s+)\S+', re.IGNORECASE)
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def redact_text(text):
+    return BEARER_RE.sub(r'\1' + REDACTED, JWT_RE.sub(REDACTED, text))
+
+
+def is_sensitive_key(key):
+    """Does a field name (any case style: apiKey, X-Api-Key, api_key) name a secret?"""
+    segments = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', str(key))
+    return SENSITIVE_KEY_RE.search(re.sub(r'[^A-Za-z0-9]+', '_', segments).lower()) is not None
+
+
+def redact(value, key=None):
+    """Copy of value with sensitive keys and token-like strings masked"""
+    if key is not None and is_sensitive_key(key):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact_text(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                payload[key] = redact(value, key)
+        if record.exc_info:
+            payload['exception'] = redact_text(self.formatException(record.exc_info))
+        return json.dumps(payload, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request fields to records logged inside a request, and applies per-request sampling"""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        if record.levelno < logging.WARNING and not g.get('log_sampled', True):
+            return False
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        return True
+
+
+class AsyncLogHandler(QueueHandler):
+    """Formats in the caller, queues without blocking; the listener thread writes"""
+
+    def __init__(self, target, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+
+    def prepare(self, record):
+        # The record is only read as a pre-formatted line from here on
+        line = self.format(record)
+        record = logging.makeLogRecord({'msg': line, 'levelno': record.levelno, 'levelname': record.levelname})
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        # The parent's listener thread doesn't exist in a forked child
+        self._pid = os.getpid()
+        self._listener = QueueListener(self.queue, self.target)
+        self._listener.start()
+        atexit.register(self._stop, self._listener, self._pid)
+
+    def _stop(self, listener, pid):
+        if pid == os.getpid():
+            listener.stop()  # writes whatever is still queued
+
+
+def parse_sample_rates(spec):
+    """{'api.endpoint': rate} from 'api.endpoint=rate,...'"""
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        endpoint, _, rate = entry.partition('=')
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+def init_logging(app):
+    """Route the root logger through the async JSON handler and tag requests with ids"""
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if isinstance(h, AsyncLogHandler)), None)
+    if handler is None:
+        target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(logging.Formatter('%(message)s'))
+        handler = AsyncLogHandler(target, app.config['LOG_QUEUE_SIZE'])
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(RequestContextFilter())
+        root.addHandler(handler)
+    root.setLevel(app.config['LOG_LEVEL'])
+    app.extensions['log_handler'] = handler
+
+    sample_rates = parse_sample_rates(app.config['LOG_SAMPLE_RATES'])
+    access_log = logging.getLogger('access')
+
+    @app.before_request
+    def _start_request_log():
+        request_id = request.headers.get('X-Request-ID', '')
+        g.request_id = request_id if REQUEST_ID_RE.match(request_id) else uuid.uuid4().hex
+        rate = sample_rates.get(request.endpoint, 1.0)
+        g.log_sampled = rate >= 1.0 or random.random() < rate
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_request_log(response):
+        # A hook registered earlier may have answered before ours ran
+        if 'request_id' not in g:
+            g.request_id = uuid.uuid4().hex
+        response.headers['X-Request-ID'] = g.request_id
+        started = g.get('request_started')
+        access_log.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2) if started else None,
+        })
+        return response
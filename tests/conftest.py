@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import pytest
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import User, create_app, db  # noqa: E402
+
+
+def attach_catalog(engine, path):
+    """Attach `path`.catalog as the catalog schema on every connection of engine"""
+    @sa.event.listens_for(engine, 'connect')
+    def attach(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ? AS catalog", (f'{path}.catalog',))
+
+
+def copy_database(source, target):
+    """Copy a SQLite database (and its catalog file) with the backup API"""
+    for suffix in ('', '.catalog'):
+        with closing(sqlite3.connect(f'{source}{suffix}')) as src, closing(sqlite3.connect(f'{target}{suffix}')) as dst:
+            src.backup(dst)
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """create_app() on a fresh SQLite file, with the catalog schema attached as a second file.
+
+    With replica=True, DATABASE_REPLICA_URLS points at a second SQLite file
+    that starts as a copy of the primary and only changes when
+    app.sync_replica() is called, so it stands in for a lagging replica.
+    """
+    def make(replica=False, **config):
+        path = tmp_path / f"catalog-{len(list(tmp_path.glob('*.db')))}.db"
+        replica_path = f'{path}.replica'
+        if replica:
+            config.setdefault('DATABASE_REPLICA_URLS', [f'sqlite:///{replica_path}'])
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+            'TESTING': True,
+            'EXPORT_DIR': str(tmp_path / 'exports'),
+            'PROFILE_DIR': str(tmp_path / 'profiles'),
+            'FRONTEND_BUILD_DIR': str(tmp_path / 'build'),
+            **config,
+        })
+        with app.app_context():
+            attach_catalog(db.engine, path)
+            db.create_all()
+            db.session.remove()
+
+        router = app.extensions.get('replica_router')
+        if router and replica:
+            for replica_db in router.replicas:
+                attach_catalog(replica_db.engine, replica_path)
+
+            def sync_replica():
+                router.dispose()
+                copy_database(path, replica_path)
+            app.sync_replica = sync_replica
+            sync_replica()
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(app, role) -> Authorization header of a new user with that role"""
+    def make(app, role='admin', username=None):
+        with app.app_context():
+            user = User(username=username or f'{role}-{User.query.count()}', role=role)
+            user.email = f'{user.username}@example.com'
+            user.set_password('Secret123!')
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id), additional_claims={'role': role})
+            db.session.remove()
+        return {'Authorization': f'Bearer {token}'}
+    return make
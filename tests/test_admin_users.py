@@ -0,0 +1,63 @@
+import json
+
+from app import User, db
+
+
+def add_users(app, users):
+    with app.app_context():
+        for username, role, is_active in users:
+            db.session.add(User(username=username, email=f'{username.lower()}@example.com', role=role,
+                                is_active=is_active, password_hash='unused'))
+        db.session.commit()
+        db.session.remove()
+
+
+def usernames(response):
+    assert response.status_code == 200, response.get_json()
+    return [user['username'] for user in response.get_json()['users']]
+
+
+def test_users_are_paged(app, auth_headers):
+    headers = auth_headers(app, username='root')
+    add_users(app, [(f'user{i:02d}', 'user', True) for i in range(25)])
+    client = app.test_client()
+
+    first = client.get('/admin/users?sort_by=username&sort_order=asc&per_page=10', headers=headers)
+    assert usernames(first)[:2] == ['root', 'user00']
+    assert first.get_json()['pagination'] == {
+        'page': 1, 'per_page': 10, 'total': 26, 'pages': 3,
+        'has_prev': False, 'has_next': True, 'prev_num': None, 'next_num': 2,
+    }
+    last = client.get('/admin/users?sort_by=username&sort_order=asc&per_page=10&page=3', headers=headers)
+    assert usernames(last) == [f'user{i:02d}' for i in range(19, 25)]
+
+
+def test_users_are_filtered(app, auth_headers):
+    headers = auth_headers(app, username='root')
+    add_users(app, [('Alice', 'user', True), ('alina', 'editor', True), ('bob_al', 'editor', False),
+                    ('al%x', 'user', True)])
+    client = app.test_client()
+
+    def search(query):
+        return sorted(usernames(client.get(f'/admin/users?{query}', headers=headers)))
+
+    assert search('q=AL') == ['Alice', 'al%x', 'alina']  # prefix, any case, on username or email
+    assert search('q=al%25') == ['al%x']  # % is literal
+    assert search('role=editor') == ['alina', 'bob_al']
+    assert search('role=editor&is_active=false') == ['bob_al']
+    assert search('is_active=true&q=b') == []
+
+
+def test_users_stream_as_ndjson(app, auth_headers):
+    headers = auth_headers(app, username='root')
+    add_users(app, [(f'user{i}', 'user', i % 2 == 0) for i in range(5)])
+
+    response = app.test_client().get('/admin/users?format=ndjson&is_active=true', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    users = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [user['username'] for user in users] == ['root', 'user0', 'user2', 'user4']
+
+
+def test_users_need_an_admin(app, auth_headers):
+    assert app.test_client().get('/admin/users', headers=auth_headers(app, role='user')).status_code == 403
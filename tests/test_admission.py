@@ -0,0 +1,48 @@
+import threading
+import time
+
+from admission import AdmissionClass
+
+
+def test_saturated_class_gets_503_with_retry_after(make_app):
+    app = make_app(ADMISSION_CLASSES='read=1/0/0,search=1/0/0', ADMISSION_RETRY_AFTER_SECONDS=7)
+    search = app.extensions['admission']['search']
+    client = app.test_client()
+    assert search.acquire()  # a slow search holds the only slot
+
+    response = client.get('/products/search?q=lamp')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.get_json()['class'] == 'search'
+    assert client.get('/products?q=lamp').status_code == 503  # text search on the listing is search too
+
+    # Other classes and exempt endpoints are unaffected
+    assert client.get('/products').status_code == 200
+    assert client.get('/health').status_code == 200
+    assert search.stats()['shed'] == 2
+
+    search.release()
+    assert client.get('/products/search?q=lamp').status_code == 200
+    assert search.stats()['active'] == 0
+
+
+def test_queued_request_is_admitted_when_a_slot_frees():
+    admission = AdmissionClass('read', limit=1, queue=1, queue_timeout=5)
+    assert admission.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(admission.acquire()))
+    waiter.start()
+    while not admission.waiting:
+        time.sleep(0.001)
+    assert not admission.acquire()  # the queue is full too
+    admission.release()
+    waiter.join(5)
+    assert admitted == [True]
+    assert admission.stats()['queued'] == 1 and admission.stats()['shed'] == 1
+
+
+def test_queue_wait_is_bounded():
+    admission = AdmissionClass('write', limit=1, queue=1, queue_timeout=0.05)
+    assert admission.acquire()
+    assert not admission.acquire()
+    assert admission.stats()['queue_timeouts'] == 1
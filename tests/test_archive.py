@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from app import Product, ProductArchive, archive_products, db, get_stat, reconcile_stats
+
+
+def add_products(app, count, active, age_days, name):
+    updated_at = datetime.utcnow() - timedelta(days=age_days)
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Product(name=f'{name} {i}', price=i + 1, is_active=active,
+                                   created_at=updated_at, updated_at=updated_at))
+        db.session.commit()
+        db.session.remove()
+
+
+def test_archive_moves_old_inactive_products_and_updates_counters(app):
+    add_products(app, 5, False, 120, 'Old')
+    add_products(app, 2, False, 1, 'Recent')
+    add_products(app, 3, True, 120, 'Live')
+    with app.app_context():
+        result = archive_products(days=90, batch_size=2)
+        assert result['archived'] == 5
+        assert Product.query.count() == 5
+        assert sorted(row.name for row in ProductArchive.query) == [f'Old {i}' for i in range(5)]
+        assert all(row.archived_at is not None for row in ProductArchive.query)
+        counts = {key: get_stat('products', key) for key in ('active', 'inactive', 'archived')}
+        assert counts == {'active': 3, 'inactive': 2, 'archived': 5}
+        assert reconcile_stats() == []
+
+        assert archive_products(days=90)['archived'] == 0
+
+
+def test_inactive_listing_pages_across_live_and_archived_rows(app, auth_headers):
+    add_products(app, 3, False, 120, 'Old')
+    add_products(app, 2, False, 1, 'Recent')
+    add_products(app, 1, True, 1, 'Live')
+    with app.app_context():
+        archive_products(days=90)
+    client = app.test_client()
+    headers = auth_headers(app)
+
+    def page(number):
+        response = client.get(f'/admin/products?status=inactive&sort_by=name&sort_order=asc&per_page=2&page={number}',
+                              headers=headers)
+        assert response.status_code == 200
+        return response.get_json()
+
+    pages = [page(number) for number in (1, 2, 3)]
+    assert pages[0]['pagination']['total'] == 5
+    assert pages[0]['pagination']['pages'] == 3
+    products = [product for body in pages for product in body['products']]
+    assert [product['name'] for product in products] == ['Old 0', 'Old 1', 'Old 2', 'Recent 0', 'Recent 1']
+    assert [product['archived_at'] is not None for product in products] == [True, True, True, False, False]
+    assert not any(product['is_active'] for product in products)
+
+    filtered = client.get('/admin/products?status=inactive&q=Recent', headers=headers).get_json()
+    assert sorted(product['name'] for product in filtered['products']) == ['Recent 0', 'Recent 1']
@@ -0,0 +1,57 @@
+import pytest
+
+import assets
+
+BUNDLE = 'console.log("catalog");\n' * 200
+
+
+@pytest.fixture
+def client(make_app, tmp_path):
+    (tmp_path / 'build' / 'static' / 'js').mkdir(parents=True)
+    (tmp_path / 'build' / 'index.html').write_text('<!doctype html><div id="root"></div>')
+    (tmp_path / 'build' / 'static' / 'js' / 'main.js').write_text(BUNDLE)
+    return make_app().test_client()
+
+
+def test_each_encoding_has_its_own_etag(client):
+    identity = client.get('/static/js/main.js', headers={'Accept-Encoding': 'identity'})
+    gzipped = client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip'})
+    assert identity.status_code == gzipped.status_code == 200
+    assert identity.get_data(as_text=True) == BUNDLE
+    assert 'Content-Encoding' not in identity.headers
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] == identity.headers['ETag'][:-1] + '-gz"'
+    assert gzipped.headers['Vary'] == 'Accept-Encoding'
+    assert 'immutable' in gzipped.headers['Cache-Control']
+
+
+def test_revalidation_only_matches_the_same_encoding(client):
+    gzipped = client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip'})
+    etag = gzipped.headers['ETag']
+
+    response = client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    # A client that can't take gzip must not have the gzip validator confirm its copy
+    response = client.get('/static/js/main.js', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == BUNDLE
+
+
+@pytest.mark.skipif(assets.brotli is None, reason='brotli is optional')
+def test_brotli_is_preferred(client):
+    response = client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['ETag'].endswith('-br"')
+
+
+def test_unknown_paths_get_index_html(client):
+    response = client.get('/products/42/edit')
+    assert response.status_code == 200
+    assert 'id="root"' in response.get_data(as_text=True)
+    assert 'immutable' not in response.headers['Cache-Control']
+
+
+def test_without_a_build_unknown_paths_are_404(app):
+    assert app.test_client().get('/anything').status_code == 404
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from app import Product, db
+
+
+def add_product(app, name, age):
+    with app.app_context():
+        product = Product(name=name, price=10, updated_at=datetime.utcnow() - age)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+        db.session.remove()
+    return product_id
+
+
+def changed_ids(response):
+    return [change['id'] for change in response.get_json()['changes']]
+
+
+def test_cursor_waits_for_rows_inside_the_safety_lag(make_app):
+    app = make_app(replica=True, CHANGE_FEED_SAFETY_LAG_SECONDS=60)
+    client = app.test_client()
+    # Neither row has reached the replica
+    old_id = add_product(app, 'Old', timedelta(minutes=5))
+    recent_id = add_product(app, 'Recent', timedelta(seconds=1))
+
+    response = client.get('/products/changes')
+    assert changed_ids(response) == [old_id]
+    cursor = response.get_json()['next_cursor']
+
+    response = client.get(f'/products/changes?since={cursor}')
+    assert changed_ids(response) == []
+    assert response.get_json()['next_cursor'] == cursor
+
+    # Once the recent row is older than the lag, the same cursor picks it up
+    with app.app_context():
+        db.session.get(Product, recent_id).updated_at = datetime.utcnow() - timedelta(minutes=2)
+        db.session.commit()
+        db.session.remove()
+    response = client.get(f'/products/changes?since={cursor}')
+    assert changed_ids(response) == [recent_id]
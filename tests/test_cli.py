@@ -0,0 +1,16 @@
+import os
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def test_flask_db_current(app):
+    # The lazy `db` group must still run Flask-Migrate's own group callback and options
+    result = app.test_cli_runner().invoke(args=['db', '-d', MIGRATIONS, 'current'])
+    assert result.exit_code == 0, result.output
+    assert 'migrate' in app.extensions
+
+
+def test_flask_db_help_lists_subcommands(app):
+    result = app.test_cli_runner().invoke(args=['db', '--help'])
+    assert result.exit_code == 0, result.output
+    assert '--directory' in result.output and 'upgrade' in result.output
@@ -0,0 +1,56 @@
+from events import Broadcaster, sse_stream
+
+
+def test_broadcaster_fans_out_to_matching_subscribers():
+    broadcaster = Broadcaster(queue_size=10)
+    everything = broadcaster.subscribe()
+    lamps = broadcaster.subscribe(product_ids={1})
+    kitchen = broadcaster.subscribe(category='Kitchen')
+
+    broadcaster.publish({'op': 'update', 'id': 1, 'category': 'lighting'})
+    broadcaster.publish({'op': 'create', 'id': 2, 'category': 'kitchen'})
+
+    assert [event['id'] for event in everything.queue.queue] == [1, 2]
+    assert [event['id'] for event in lamps.queue.queue] == [1]
+    assert [event['id'] for event in kitchen.queue.queue] == [2]
+
+
+def test_slow_subscriber_overflows_without_blocking_the_others():
+    broadcaster = Broadcaster(queue_size=2)
+    slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+    stream = sse_stream(broadcaster, slow, heartbeat=0.01)
+    assert next(stream) == 'retry: 3000\n\n'
+
+    for product_id in range(3):
+        broadcaster.publish({'op': 'update', 'id': product_id})
+        fast.queue.get_nowait()
+    assert slow.overflowed
+
+    # The client resumes from /products/changes, so what is still queued isn't sent
+    assert list(stream) == ['event: overflow\ndata: {}\n\n']
+    assert len(broadcaster) == 1
+
+
+def test_subscribers_are_capped():
+    broadcaster = Broadcaster(max_subscribers=1)
+    first = broadcaster.subscribe()
+    assert broadcaster.subscribe() is None
+    broadcaster.unsubscribe(first)
+    assert broadcaster.subscribe() is not None
+
+
+def test_streams_past_the_cap_get_503(make_app):
+    app = make_app(SSE_MAX_STREAMS=1, SSE_HEARTBEAT_SECONDS=0.01)
+    client = app.test_client()
+    first = client.get('/products/stream', buffered=False)
+    assert first.status_code == 200
+    assert next(first.response) == b'retry: 3000\n\n'
+
+    second = client.get('/products/stream', buffered=False)
+    assert second.status_code == 503
+    assert second.headers['Retry-After']
+
+    first.close()
+    third = client.get('/products/stream', buffered=False)
+    assert third.status_code == 200
+    third.close()
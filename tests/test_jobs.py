@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from app import Job, db, job_registry
+from jobs import Worker
+
+
+def test_reap_requeues_stale_jobs_and_fails_exhausted_ones(app):
+    with app.app_context():
+        stale = datetime.utcnow() - timedelta(hours=1)
+        retry = Job(kind='reconcile-stats', status='running', attempts=1, max_attempts=3, locked_at=stale)
+        poison = Job(kind='reconcile-stats', status='running', attempts=3, max_attempts=3, locked_at=stale)
+        fresh = Job(kind='reconcile-stats', status='running', attempts=3, max_attempts=3,
+                    locked_at=datetime.utcnow())
+        db.session.add_all([retry, poison, fresh])
+        db.session.commit()
+
+        Worker(db, Job, job_registry, lock_timeout=600).reap()
+        db.session.expire_all()
+        assert retry.status == 'queued' and retry.locked_at is None
+        assert poison.status == 'failed' and poison.finished_at is not None
+        assert fresh.status == 'running'
+
+
+def test_reconcile_stats_job_refreshes_its_lock(app):
+    with app.app_context():
+        job = Job(kind='reconcile-stats', payload={'fix': True})
+        db.session.add(job)
+        db.session.commit()
+
+        worker = Worker(db, Job, job_registry)
+        claimed = worker.claim()
+        job_id, claimed_at = claimed.id, claimed.locked_at
+        heartbeats = []
+        update = worker.update
+
+        def recording_update(job_id, **values):
+            if 'locked_at' in values:
+                heartbeats.append(values['locked_at'])
+            update(job_id, **values)
+        worker.update = recording_update
+        assert worker.run_job(claimed)
+
+        assert heartbeats and all(locked_at >= claimed_at for locked_at in heartbeats)
+        assert db.session.get(Job, job_id).status == 'succeeded'
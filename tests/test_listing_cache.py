@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import Product, db
+
+
+@pytest.fixture
+def ranked_app(make_app):
+    """Memory search engine, with an older strong match and a newer weak one for 'chair'"""
+    app = make_app(SEARCH_ENGINE='memory')
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add_all([
+            Product(name='chair chair chair', description='chair', price=10, created_at=now - timedelta(days=1)),
+            Product(name='desk', description='pairs with a chair', price=20, created_at=now),
+        ])
+        db.session.commit()
+        db.session.remove()
+    return app
+
+
+def names(response):
+    return [product['name'] for product in response.get_json()['products']]
+
+
+@pytest.mark.parametrize('first', ['relevance', 'date'])
+def test_relevance_and_date_order_are_cached_separately(ranked_app, first):
+    client = ranked_app.test_client()
+    requests = {
+        'relevance': ('/products/search?q=chair', ['chair chair chair', 'desk']),
+        'date': ('/products/search?q=chair&sort_by=created_at&sort_order=desc', ['desk', 'chair chair chair']),
+    }
+    order = [first] + [name for name in requests if name != first]
+    for name in order:
+        path, expected = requests[name]
+        response = client.get(path)
+        assert response.headers['X-Cache'] == 'MISS'
+        assert names(response) == expected
+    for name in order:
+        path, expected = requests[name]
+        response = client.get(path)
+        assert response.headers['X-Cache'] == 'HIT'
+        assert names(response) == expected
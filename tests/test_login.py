@@ -0,0 +1,31 @@
+import pytest
+
+from app import User, db
+from query_budget import QueryRecorder
+
+PASSWORD = 'Login123!'
+
+
+def register(client):
+    response = client.post('/auth/register', json={'username': 'shopper', 'email': 'shopper@example.com',
+                                                    'password': PASSWORD})
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize('flush_seconds, queries', [(0, 2), (60, 1)])
+def test_login_within_budget_in_both_write_modes(make_app, flush_seconds, queries):
+    app = make_app(ENFORCE_QUERY_BUDGETS=True, WRITE_BEHIND_FLUSH_SECONDS=flush_seconds)
+    client = app.test_client()
+    register(client)
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    with QueryRecorder(*engines) as recorder:
+        response = client.post('/auth/login', json={'username': 'shopper', 'password': PASSWORD})
+    assert response.status_code == 200
+    assert response.get_json()['user']['last_login']
+    assert len(recorder.statements) == queries
+
+    with app.app_context():
+        stored = User.query.filter_by(username='shopper').one().last_login
+    assert (stored is not None) == (flush_seconds == 0)
@@ -0,0 +1,86 @@
+import pytest
+import sqlalchemy as sa
+
+import online_migrations
+from app import Product, db
+from online_migrations import QUERY_CANCELED, backfill
+
+
+class Interrupted(Exception):
+    pass
+
+
+class StatementTimeout(Exception):
+    pgcode = QUERY_CANCELED
+
+
+class TimingOutConnection:
+    """Connection whose backfill UPDATEs time out when they span more than max_range keys"""
+
+    def __init__(self, connection, max_range):
+        self.connection = connection
+        self.max_range = max_range
+        self.ranges = []
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def execute(self, statement, parameters=None):
+        if str(statement).startswith('UPDATE'):
+            self.ranges.append(parameters['high'] - parameters['low'])
+            if self.ranges[-1] > self.max_range:
+                raise sa.exc.OperationalError(str(statement), parameters, StatementTimeout())
+        return self.connection.execute(statement, parameters)
+
+
+@pytest.fixture
+def products(app, monkeypatch):
+    monkeypatch.setattr(online_migrations.time, 'sleep', lambda seconds: None)
+    with app.app_context():
+        db.session.add_all([Product(name=f'Product {i}', price=1) for i in range(20)])
+        db.session.commit()
+        db.session.remove()
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            yield connection
+
+
+def untagged(connection):
+    return connection.execute(sa.text("SELECT count(*) FROM catalog.products WHERE tags IS NULL")).scalar()
+
+
+def test_backfill_resumes_after_an_interruption(products):
+    seen = []
+
+    def interrupt_after_two_batches(done_key, max_key, rows):
+        seen.append((done_key, rows))
+        if len(seen) == 2:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        backfill(products, 'products', "tags = 'new'", where='tags IS NULL', batch_size=5,
+                 progress=interrupt_after_two_batches)
+    assert untagged(products) == 10
+
+    seen.clear()
+    rows = backfill(products, 'products', "tags = 'new'", where='tags IS NULL', batch_size=5,
+                    progress=lambda done_key, max_key, rows: seen.append((done_key, rows)))
+    assert seen == [(15, 15), (20, 20)]  # picked up after key 10, counting the earlier rows
+    assert rows == 20
+    assert untagged(products) == 0
+    assert products.execute(sa.text("SELECT count(*) FROM catalog.online_migration_progress")).scalar() == 0
+
+
+def test_backfill_halves_the_batch_on_timeouts(products):
+    connection = TimingOutConnection(products, max_range=3)
+    rows = backfill(connection, 'products', "tags = 'new'", where='tags IS NULL', batch_size=16, min_batch_size=2)
+    assert rows == 20
+    assert connection.ranges[:3] == [16, 8, 4]
+    assert set(connection.ranges[3:]) == {2}  # 16 → 8 → 4 still time out, 2 keeps going
+    assert untagged(products) == 0
+
+
+def test_backfill_gives_up_at_the_minimum_batch(products):
+    connection = TimingOutConnection(products, max_range=1)
+    with pytest.raises(sa.exc.OperationalError):
+        backfill(connection, 'products', "tags = 'new'", batch_size=8, min_batch_size=2)
+    assert connection.ranges == [8, 4, 2]
@@ -0,0 +1,58 @@
+import time
+
+import profiling
+from profiling import issue_token, verify_token
+
+SECRET = 'profiling-test-secret'
+
+
+def test_tokens_verify_only_unmodified_and_unexpired():
+    token = issue_token(SECRET, 'admin')
+    assert verify_token(SECRET, token, max_age=60)
+    assert not verify_token('another-secret', token, max_age=60)
+    assert not verify_token(SECRET, token[:-2] + 'xx', max_age=60)
+    time.sleep(1.1)
+    assert not verify_token(SECRET, token, max_age=0)
+
+
+def test_token_or_sample_rate_selects_requests(make_app, tmp_path):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=0.0, SECRET_KEY=SECRET)
+    client = app.test_client()
+    assert 'X-Profile-Id' not in client.get('/health').headers
+    assert 'X-Profile-Id' not in client.get('/health', headers={'X-Profile': 'forged'}).headers
+
+    token = issue_token(SECRET, 'admin')
+    profile_id = client.get('/health', headers={'X-Profile': token}).headers['X-Profile-Id']
+    assert client.get(f'/health?_profile={token}').headers['X-Profile-Id'] != profile_id
+    meta = app.extensions['profiles'].list()[0]
+    assert meta['reason'] == 'token' and meta['args'] == {}
+
+    sampled = make_app(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0, PROFILE_DIR=str(tmp_path / 'sampled'))
+    assert 'X-Profile-Id' in sampled.test_client().get('/health').headers
+    assert sampled.extensions['profiles'].list()[0]['reason'] == 'sampled'
+
+
+def test_only_the_newest_profiles_are_kept(make_app):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_COUNT=2)
+    client = app.test_client()
+    ids = [client.get('/health').headers['X-Profile-Id'] for _ in range(3)]
+
+    store = app.extensions['profiles']
+    assert [meta['id'] for meta in store.list()] == ids[:0:-1]
+    assert store.path(ids[0], 'pstats') is None
+    assert store.path(ids[2], 'pstats') and store.path(ids[2], 'collapsed')
+    assert store.path('../etc/passwd', 'pstats') is None
+
+
+def test_a_second_profiled_request_is_skipped_while_one_runs(make_app):
+    app = make_app(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0)
+    client = app.test_client()
+    with profiling._profiling_lock:  # another thread is being profiled
+        response = client.get('/health')
+    assert response.status_code == 200
+    assert response.headers['X-Profile-Skipped'] == 'busy'
+    assert 'X-Profile-Id' not in response.headers
+
+    # Released after every profiled request
+    assert 'X-Profile-Id' in client.get('/health').headers
+    assert not profiling._profiling_lock.locked()
@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_not_ready_until_warmed_up(app):
+    warm_up = app.extensions['warm_up']
+    gate = threading.Event()
+    warm_up.steps.insert(0, ('gate', lambda: gate.wait(5)))
+    client = app.test_client()
+
+    response = client.get('/health/ready')  # starts the warm-up in the background
+    assert response.status_code == 503
+    assert response.get_json()['checks']['warm_up']['state'] in ('pending', 'running')
+    assert client.get('/health/live').status_code == 200
+
+    gate.set()
+    assert wait_for(lambda: warm_up.done)
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'ready'
+    assert set(body['checks']['warm_up']['steps_ms']) == {'gate', 'connections', 'hot_paths', 'search_index'}
+
+
+def test_failed_warm_up_is_retried_by_the_next_probe(app):
+    warm_up = app.extensions['warm_up']
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('database still starting')
+    warm_up.steps.insert(0, ('flaky', flaky))
+
+    assert not warm_up.run()  # as gunicorn's post_worker_init hook does
+    assert warm_up.stats()['state'] == 'failed'
+    assert warm_up.stats()['error'] == 'flaky: database still starting'
+
+    client = app.test_client()
+    assert client.get('/health/ready').status_code == 503  # and starts another attempt
+
+    assert wait_for(lambda: warm_up.done)
+    assert client.get('/health/ready').status_code == 200
+    assert len(attempts) == 2
@@ -0,0 +1,50 @@
+from app import Product, ProductRelated, compute_related, db
+
+
+def add_products(app, *products):
+    with app.app_context():
+        rows = [Product(price=price, **fields) for fields, price in products]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = [row.id for row in rows]
+        db.session.remove()
+    return ids
+
+
+def related_ids(client, product_id, query=''):
+    response = client.get(f'/products/{product_id}/related{query}')
+    assert response.status_code == 200
+    return [product['id'] for product in response.get_json()['related']]
+
+
+def test_related_are_ordered_by_rank_without_inactive_products(app):
+    lamp, desk, shade, bulb = add_products(app, ({'name': 'Lamp'}, 10), ({'name': 'Desk'}, 100),
+                                           ({'name': 'Shade'}, 5), ({'name': 'Bulb'}, 2))
+    with app.app_context():
+        db.session.add_all([ProductRelated(product_id=lamp, rank=rank, related_id=related_id, score=1 - rank / 10)
+                            for rank, related_id in enumerate([shade, desk, bulb])])
+        db.session.commit()
+    client = app.test_client()
+    assert related_ids(client, lamp) == [shade, desk, bulb]
+    assert related_ids(client, lamp, '?k=2') == [shade, desk]
+
+    with app.app_context():
+        db.session.get(Product, desk).is_active = False
+        db.session.commit()
+    assert related_ids(client, lamp) == [shade, bulb]
+    assert related_ids(client, desk) == []
+
+
+def test_compute_related_prefers_similar_active_products(app):
+    lamp, shade, old_lamp, sofa = add_products(
+        app,
+        ({'name': 'Brass desk lamp', 'tags': 'lamp,lighting', 'category': 'Lighting'}, 40),
+        ({'name': 'Brass lamp shade', 'tags': 'lamp,lighting', 'category': 'Lighting'}, 20),
+        ({'name': 'Brass desk lamp classic', 'tags': 'lamp,lighting', 'category': 'Lighting', 'is_active': False}, 40),
+        ({'name': 'Velvet sofa', 'tags': 'seating', 'category': 'Living room'}, 900),
+    )
+    with app.app_context():
+        compute_related(k=5)
+    related = related_ids(app.test_client(), lamp)
+    assert related[0] == shade
+    assert old_lamp not in related
@@ -0,0 +1,77 @@
+import sqlalchemy as sa
+
+from app import Product, db
+from replicas import PRIMARY_PIN_COOKIE
+
+PASSWORD = 'Replica123!'
+
+
+def login(client, username='writer'):
+    client.post('/auth/register', json={'username': username, 'email': f'{username}@example.com',
+                                        'password': PASSWORD})
+    response = client.post('/auth/login', json={'username': username, 'password': PASSWORD})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def replica_product_names(app):
+    with app.extensions['replica_router'].replicas[0].engine.connect() as conn:
+        return [name for name, in conn.execute(sa.text('SELECT name FROM catalog.products'))]
+
+
+def test_read_only_requests_read_the_replica(make_app):
+    app = make_app(replica=True, RESULT_CACHE_MAX_BYTES=0)
+    with app.app_context():
+        product = Product(name='Lamp', price=10)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+        db.session.remove()
+
+    client = app.test_client()
+    assert client.get(f'/products/{product_id}').status_code == 404
+    app.sync_replica()
+    assert client.get(f'/products/{product_id}').status_code == 200
+
+
+def test_writes_stay_on_the_primary_and_pin_the_writer(make_app):
+    app = make_app(replica=True, RESULT_CACHE_MAX_BYTES=0)
+    writer = app.test_client()
+    headers = login(writer)
+    app.sync_replica()
+
+    response = writer.post('/products', json={'name': 'Kettle', 'price': 30}, headers=headers)
+    assert response.status_code == 201
+    product_id = response.get_json()['product']['id']
+    assert writer.get_cookie(PRIMARY_PIN_COOKIE) is not None
+    with app.app_context():
+        assert db.session.get(Product, product_id).name == 'Kettle'
+    assert replica_product_names(app) == []
+
+    # Pinned by the cookie, and by identity from a client that doesn't have it
+    assert writer.get(f'/products/{product_id}').status_code == 200
+    assert app.test_client().get(f'/products/{product_id}', headers=headers).status_code == 200
+    # Anyone else reads the replica, which hasn't caught up yet
+    assert app.test_client().get(f'/products/{product_id}').status_code == 404
+
+
+def test_reads_fail_over_to_the_primary_when_the_replica_is_down(make_app, tmp_path):
+    app = make_app(RESULT_CACHE_MAX_BYTES=0,
+                   DATABASE_REPLICA_URLS=[f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+    with app.app_context():
+        product = Product(name='Lamp', price=10)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+        db.session.remove()
+    router = app.extensions['replica_router']
+    client = app.test_client()
+
+    # The first request to hit the dead replica fails and takes it out of rotation
+    assert client.get(f'/products/{product_id}').status_code == 500
+    assert router.status()[0]['healthy'] is False
+    assert client.get(f'/products/{product_id}').status_code == 200
+
+    # The health check keeps it out while it stays down
+    router.replicas[0].check()
+    assert router.pick() is None
+    assert client.get(f'/products/{product_id}').status_code == 200
@@ -0,0 +1,96 @@
+import time
+
+from flask import Flask, jsonify
+
+from app import CATALOG_CHANGES_CHANNEL, Product, db, get_event_listener
+from cache import ResultCache, cached_response
+from replicas import PRIMARY_PIN_COOKIE
+
+
+def test_set_after_concurrent_eviction_is_dropped():
+    cache = ResultCache()
+    sequence = cache.sequence
+    cache.discard(lambda key: key[0] == 'api.get_products')  # a write lands mid-miss
+    cache.set(('api.get_products', 'live', ()), b'old', sequence)
+    assert cache.get(('api.get_products', 'live', ())) is None
+    assert cache.stats()['stale_sets'] == 1
+
+    cache.set(('api.get_products', 'live', ()), b'new', cache.sequence)
+    assert cache.get(('api.get_products', 'live', ())) == b'new'
+
+
+def test_miss_overlapping_an_eviction_is_not_cached():
+    app = Flask(__name__)
+    cache = app.extensions['result_cache'] = ResultCache()
+    catalog = {'price': 1}
+
+    @app.route('/price')
+    @cached_response(lambda: ('price', 'live'))
+    def price():
+        body = jsonify(catalog)
+        # The write commits and its notification evicts before this miss is stored
+        catalog['price'] = 2
+        cache.discard(lambda key: True)
+        return body
+
+    client = app.test_client()
+    assert client.get('/price').get_json() == {'price': 1}
+    response = client.get('/price')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json() == {'price': 2}
+
+
+def test_lagging_replica_body_is_not_served_to_a_pinned_writer(make_app):
+    app = make_app(replica=True)
+    with app.app_context():
+        get_event_listener()
+        app.extensions['events']['invalidator'].live = True  # as if LISTEN were connected
+        product = Product(name='Lamp', price=10)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+        db.session.remove()
+    app.sync_replica()
+
+    reader, writer = app.test_client(), app.test_client()
+    assert reader.get(f'/products/{product_id}').get_json()['price'] == 10
+
+    # The write evicts the key at commit; the replica hasn't replayed it yet
+    with app.app_context():
+        db.session.get(Product, product_id).price = 12
+        db.session.commit()
+        db.session.remove()
+    assert reader.get(f'/products/{product_id}').get_json()['price'] == 10
+
+    writer.set_cookie(PRIMARY_PIN_COOKIE, str(time.time() + 60))
+    response = writer.get(f'/products/{product_id}')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['price'] == 12
+
+
+def test_commit_evicts_its_own_changes_before_the_notification_arrives(app):
+    with app.app_context():
+        listener = get_event_listener()
+        app.extensions['events']['invalidator'].live = True  # as if LISTEN were connected
+        listener.handlers[CATALOG_CHANGES_CHANNEL] = []  # our NOTIFY hasn't come back around yet
+        lamp, kettle = Product(name='Lamp', price=10), Product(name='Kettle', price=30)
+        db.session.add_all([lamp, kettle])
+        db.session.commit()
+        lamp_id, kettle_id = lamp.id, kettle.id
+        db.session.remove()
+
+    client = app.test_client()
+    for path in (f'/products/{lamp_id}', f'/products/{kettle_id}', '/products'):
+        client.get(path)
+        assert client.get(path).headers['X-Cache'] == 'HIT'
+
+    with app.app_context():
+        db.session.get(Product, lamp_id).price = 12
+        db.session.commit()
+        db.session.remove()
+
+    response = client.get(f'/products/{lamp_id}')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['price'] == 12
+    assert client.get('/products').headers['X-Cache'] == 'MISS'  # listings depend on every product
+    assert client.get(f'/products/{kettle_id}').headers['X-Cache'] == 'HIT'
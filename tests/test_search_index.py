@@ -0,0 +1,69 @@
+from app import Product, db, publish_product_event
+
+
+def indexed_ids(app, query):
+    return [product_id for product_id, _ in app.extensions['search_index'].search(query)]
+
+
+def test_index_reloads_changed_products_from_the_primary(make_app):
+    app = make_app(replica=True, SEARCH_ENGINE='memory', RESULT_CACHE_MAX_BYTES=0)
+    with app.app_context():
+        lamp = Product(name='Brass lamp', price=10)
+        db.session.add(lamp)
+        db.session.commit()
+        lamp_id = lamp.id
+        db.session.remove()
+    app.sync_replica()
+    client = app.test_client()
+    assert client.get('/products/search?q=lamp').status_code == 200
+    assert indexed_ids(app, 'brass') == [lamp_id]
+
+    # Written to the primary only; the replica lags behind both changes
+    with app.app_context():
+        lamp = db.session.get(Product, lamp_id)
+        lamp.name = 'Copper lamp'
+        kettle = Product(name='Copper kettle', price=30)
+        db.session.add(kettle)
+        db.session.flush()
+        publish_product_event('update', lamp)
+        publish_product_event('create', kettle)
+        db.session.commit()
+        kettle_id = kettle.id
+        db.session.remove()
+
+    assert client.get('/products/search?q=copper').status_code == 200
+    assert indexed_ids(app, 'brass') == []
+    assert sorted(indexed_ids(app, 'copper')) == sorted([lamp_id, kettle_id])
+
+
+def test_index_rescans_after_reconnect_when_the_catalog_moved(make_app):
+    app = make_app(SEARCH_ENGINE='memory')
+    with app.app_context():
+        lamp = Product(name='Brass lamp', price=10)
+        db.session.add(lamp)
+        db.session.commit()
+        lamp_id = lamp.id
+        db.session.remove()
+    client = app.test_client()
+    assert client.get('/products/search?q=lamp').status_code == 200
+    listener = app.extensions['events']['listener']
+
+    # Nothing written while disconnected: the index is kept as is
+    for handler in listener.reconnect_handlers:
+        handler()
+    assert app.extensions['search_index_sync']['rescan'] is False
+
+    # Written while the listener was down, so no product_changes arrived
+    with app.app_context():
+        db.session.get(Product, lamp_id).is_active = False
+        db.session.add(Product(name='Copper kettle', price=30))
+        db.session.commit()
+        db.session.remove()
+    assert client.get('/products/search?q=copper').status_code == 200
+    assert indexed_ids(app, 'copper') == []
+
+    for handler in listener.reconnect_handlers:
+        handler()
+    assert client.get('/products/search?q=copper').status_code == 200
+    assert indexed_ids(app, 'brass') == []
+    assert len(indexed_ids(app, 'copper')) == 1
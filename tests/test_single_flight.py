@@ -0,0 +1,91 @@
+import threading
+import time
+
+from cache import SingleFlight
+
+FOLLOWERS = 8
+
+
+def run_concurrently(flights, compute, count):
+    results = [None] * count
+    def call(i):
+        results[i] = flights.do('key', compute)
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_identical_misses_share_one_computation():
+    flights = SingleFlight(timeout=5)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b'body', 'response'
+
+    leader, leader_result = run_concurrently(flights, compute, 1)
+    started.wait(5)
+    followers, results = run_concurrently(flights, compute, FOLLOWERS)
+    time.sleep(0.2)  # let every follower find the leader's flight
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert leader_result == [(b'body', 'response', False)]
+    assert results == [(b'body', None, True)] * FOLLOWERS
+    assert len(calls) == 1
+    assert flights.stats() == {'in_flight': 0, 'leaders': 1, 'coalesced': FOLLOWERS, 'timeouts': 0}
+
+
+def test_followers_compute_themselves_when_the_leader_is_too_slow():
+    flights = SingleFlight(timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return b'slow', None
+
+    leader, _ = run_concurrently(flights, slow, 1)
+    started.wait(5)
+    followers, results = run_concurrently(flights, lambda: (b'own', None), FOLLOWERS)
+    for thread in followers:
+        thread.join(5)
+    release.set()
+    leader[0].join(5)
+
+    assert results == [(b'own', None, False)] * FOLLOWERS
+    assert flights.stats()['timeouts'] == FOLLOWERS
+    assert flights.stats()['coalesced'] == 0
+
+
+def test_followers_compute_themselves_when_the_leader_fails():
+    flights = SingleFlight(timeout=5)
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('query failed')
+
+    errors = []
+    def lead():
+        try:
+            flights.do('key', failing)
+        except RuntimeError as e:
+            errors.append(e)
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    followers, results = run_concurrently(flights, lambda: (b'own', None), FOLLOWERS)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(errors) == 1
+    assert results == [(b'own', None, False)] * FOLLOWERS
+    assert flights.stats()['timeouts'] == 0
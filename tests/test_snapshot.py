@@ -0,0 +1,77 @@
+import sqlite3
+from contextlib import closing
+
+from app import Product, User, db, export_snapshot
+
+
+def add_product(app, name, is_active=True):
+    with app.app_context():
+        creator = User.query.filter_by(username='maker').first()
+        if creator is None:
+            creator = User(username='maker', email='maker@example.com', password_hash='secret-hash')
+            db.session.add(creator)
+        db.session.add(Product(name=name, price=10, is_active=is_active, creator=creator))
+        db.session.commit()
+        db.session.remove()
+
+
+def export(app, path):
+    with app.app_context():
+        info = export_snapshot(path)
+        db.session.remove()
+    return info
+
+
+def listed_names(client):
+    response = client.get('/products?sort_by=name&sort_order=asc')
+    assert response.status_code == 200
+    return [product['name'] for product in response.get_json()['products']]
+
+
+def test_snapshot_round_trip(make_app, tmp_path):
+    source = make_app()
+    add_product(source, 'Lamp')
+    add_product(source, 'Retired lamp', is_active=False)
+    path = str(tmp_path / 'snapshots' / 'catalog.sqlite')
+    assert export(source, path)['generation'] == '2'
+
+    served = make_app(CATALOG_SNAPSHOT=path).test_client()
+    response = served.get('/products')
+    assert [(product['name'], product['creator_username']) for product in response.get_json()['products']] == [
+        ('Lamp', 'maker')
+    ]
+    assert served.get('/products/search?q=lamp').status_code == 200
+    assert served.get('/products/categories').status_code == 200
+
+    # No emails or password hashes leave the database
+    with closing(sqlite3.connect(path)) as conn:
+        assert conn.execute('SELECT email, password_hash FROM user').fetchall() == [('1@snapshot.invalid', '')]
+
+
+def test_snapshot_mode_refuses_everything_else(make_app, tmp_path, auth_headers):
+    source = make_app()
+    add_product(source, 'Lamp')
+    path = str(tmp_path / 'catalog.sqlite')
+    export(source, path)
+
+    app = make_app(CATALOG_SNAPSHOT=path)
+    client = app.test_client()
+    assert client.post('/auth/login', json={'username': 'maker', 'password': 'x'}).status_code == 503
+    assert client.post('/products', json={'name': 'New', 'price': 1}).status_code == 503
+    assert client.get('/products/changes').status_code == 503
+    assert client.get('/admin/users', headers=auth_headers(source)).status_code == 503
+    assert client.get('/health').get_json()['snapshot']['generation'] == '1'
+
+
+def test_new_snapshot_is_picked_up_without_a_restart(make_app, tmp_path):
+    source = make_app()
+    add_product(source, 'Lamp')
+    path = str(tmp_path / 'catalog.sqlite')
+    export(source, path)
+    client = make_app(CATALOG_SNAPSHOT=path, CATALOG_SNAPSHOT_CHECK_SECONDS=0).test_client()
+    assert listed_names(client) == ['Lamp']
+
+    add_product(source, 'Kettle')
+    export(source, path)
+    assert listed_names(client) == ['Kettle', 'Lamp']
+    assert client.get('/health').get_json()['snapshot']['swaps'] == 1
@@ -0,0 +1,39 @@
+from app import Product, User, db, get_stat, reconcile_stats
+
+
+def test_counters_follow_product_and_user_writes(app):
+    with app.app_context():
+        user = User(username='maker', email='maker@example.com')
+        user.set_password('Maker123!')
+        db.session.add(user)
+        db.session.commit()
+        product = Product(name='Lamp', price=10, category='lighting', created_by=user.id)
+        db.session.add(product)
+        db.session.commit()
+        assert reconcile_stats() == []
+        assert get_stat('category', 'lighting') == 1
+
+        # Every commit expires the objects, so each write below starts from unloaded attributes
+        product.price = 12
+        db.session.commit()
+        assert reconcile_stats() == []
+
+        product.category = 'kitchen'
+        db.session.commit()
+        assert reconcile_stats() == []
+        assert (get_stat('category', 'lighting'), get_stat('category', 'kitchen')) == (0, 1)
+
+        product.created_by = None
+        db.session.commit()
+        assert reconcile_stats() == []
+        assert get_stat('user_products', str(user.id)) == 0
+
+        product.is_active = False
+        db.session.commit()
+        assert reconcile_stats() == []
+        assert (get_stat('products', 'active'), get_stat('products', 'inactive')) == (0, 1)
+
+        user.is_active = False
+        db.session.commit()
+        assert reconcile_stats() == []
+        assert (get_stat('users', 'total'), get_stat('users', 'active')) == (1, 0)
@@ -0,0 +1,41 @@
+import os
+import time
+
+from write_behind import WriteBehindBuffer
+
+
+def test_new_keys_past_max_keys_are_dropped():
+    buffer = WriteBehindBuffer(interval=60, max_keys=2)
+    written = []
+    buffer.register('views', written.append)
+    buffer._pid = os.getpid()  # as if the flusher were running; flushed by hand below
+
+    for key in (1, 2, 3, 1):
+        buffer.add('views', key, 1)
+    assert buffer.stats()['pending'] == {'views': 2}
+    assert buffer.stats()['dropped'] == 1
+
+    assert buffer.flush()
+    assert written == [{1: 2, 2: 1}]
+
+
+def test_failed_flushes_are_kept_and_retried_with_backoff():
+    buffer = WriteBehindBuffer(interval=0.01, max_keys=1)
+    attempts = []
+
+    def unavailable(batch):
+        attempts.append(dict(batch))
+        raise ConnectionError('database is down')
+    buffer.register('views', unavailable)
+
+    deadline = time.monotonic() + 0.5
+    while time.monotonic() < deadline:
+        buffer.add('views', 1, 1)  # the buffer is full, so each add asks for a flush
+        time.sleep(0.001)
+
+    # 0.02 + 0.04 + 0.08 + 0.16 + 0.32 s of backoff fit in the window; a busy loop would not stop
+    assert 2 <= len(attempts) <= 6
+    assert buffer.stats()['failures'] == len(attempts)
+    assert buffer.stats()['pending'] == {'views': 1}
+    assert attempts[-1][1] > attempts[0][1]  # the failed batch was kept, and added to since
+    buffer.register('views', lambda batch: None)  # let the exit handler's flush succeed
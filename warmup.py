@@ -0,0 +1,81 @@
+"""Per-worker warm-up.
+
+A freshly started worker pays for opening database connections, compiling
+SQLAlchemy statements and filling its caches on its first real requests.
+WarmUp runs a list of named steps that take those costs up front, once per
+process (a forked worker starts over), and records how long each took.
+``/health/ready`` reports not-ready until it has finished. gunicorn runs it
+from the post_worker_init hook in gunicorn.conf.py before the worker accepts
+connections; under any other server the first readiness probe starts it in
+the background.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Runs steps [(name, callable), ...] once per process"""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.state = 'pending'
+        self.timings = {}
+        self.error = None
+        self.started_at = None
+        self.duration = None
+
+    def run(self):
+        """Run the steps now, unless this process already has (or is)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self.state in ('running', 'done'):
+                return self.state == 'done'
+            self.state = 'running'
+            self.error = None
+            self.started_at = time.time()
+
+        started = time.perf_counter()
+        for name, step in self.steps:
+            step_started = time.perf_counter()
+            try:
+                step()
+            except Exception as exc:
+                logger.exception("warm-up step %s failed", name)
+                self.error = f"{name}: {exc}"
+                self.state = 'failed'  # the next start() tries again
+                return False
+            self.timings[name] = round((time.perf_counter() - step_started) * 1000, 2)
+        self.duration = round((time.perf_counter() - started) * 1000, 2)
+        self.state = 'done'
+        logger.info("worker %d warmed up in %.0f ms", os.getpid(), self.duration)
+        return True
+
+    def start(self):
+        """Run in the background unless this process has finished or is running it"""
+        if self._pid == os.getpid() and self.state in ('running', 'done'):
+            return
+        threading.Thread(target=self.run, name='warm-up', daemon=True).start()
+
+    @property
+    def done(self):
+        return self._pid == os.getpid() and self.state == 'done'
+
+    def stats(self):
+        current = self._pid == os.getpid()
+        return {
+            'state': self.state if current else 'pending',
+            'error': self.error if current else None,
+            'duration_ms': self.duration if current else None,
+            'steps_ms': self.timings if current else {},
+        }
@@ -0,0 +1,117 @@
+"""Write-behind buffer for hot counters.
+
+Per-request increments (product views, login timestamps) are merged in memory
+per worker and written by a background thread every ``interval`` seconds, one
+batched statement per kind, instead of one row update per request. At most
+``max_keys`` keys per kind are held; past that new keys are dropped (and
+counted), and while flushes fail the flusher backs off. Whatever is buffered when a worker dies without running its exit handlers (SIGKILL,
+OOM kill) is lost: at most ``interval`` seconds of events per worker.
+"""
+
+import atexit
+import logging
+import operator
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed flushes stretch the wait up to this many intervals
+MAX_BACKOFF_INTERVALS = 32
+
+
+class WriteBehindBuffer:
+    """Aggregates (kind, key) -> value in memory; flushes each kind with its own function"""
+
+    def __init__(self, interval=5.0, max_keys=50000):
+        self.interval = interval
+        self.max_keys = max_keys
+        self.kinds = {}
+        self.flushed = 0
+        self.failures = 0
+        self.dropped = 0
+        self._failed_flushes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        atexit.register(self.flush)
+
+    def register(self, kind, flush, merge=operator.add):
+        """flush(batch) writes {key: value}; merge combines two values for the same key"""
+        self.kinds[kind] = (flush, merge)
+
+    def add(self, kind, key, value):
+        merge = self.kinds[kind][1]
+        with self._lock:
+            pending = self._pending.setdefault(kind, {})
+            if key in pending:
+                pending[key] = merge(pending[key], value)
+            elif len(pending) < self.max_keys:
+                pending[key] = value
+            else:
+                self.dropped += 1
+            full = len(pending) >= self.max_keys
+        if self._pid != os.getpid():
+            self._start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything pending; False if any kind failed (and was kept for the next try)"""
+        ok = True
+        with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, {}
+            for kind, batch in batches.items():
+                flush, merge = self.kinds[kind]
+                try:
+                    flush(batch)
+                    self.flushed += len(batch)
+                except Exception:
+                    ok = False
+                    self.failures += 1
+                    logger.exception("write-behind flush of %d %s failed", len(batch), kind)
+                    self._requeue(kind, batch, merge)
+        return ok
+
+    def _requeue(self, kind, batch, merge):
+        # Keep the failed batch for the next attempt, but never grow past max_keys
+        with self._lock:
+            pending = self._pending.setdefault(kind, {})
+            for key, value in batch.items():
+                if key in pending:
+                    pending[key] = merge(value, pending[key])
+                elif len(pending) < self.max_keys:
+                    pending[key] = value
+                else:
+                    self.dropped += 1
+
+    def _start(self):
+        # One flusher per process; after a fork the parent's thread doesn't exist here
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name='write-behind', daemon=True).start()
+
+    def _run(self):
+        while True:
+            if self._failed_flushes:
+                # The database is down: a full buffer mustn't turn this into a busy loop
+                time.sleep(self.interval * min(2 ** self._failed_flushes, MAX_BACKOFF_INTERVALS))
+            else:
+                self._wake.wait(self.interval)
+            self._wake.clear()
+            self._failed_flushes = 0 if self.flush() else self._failed_flushes + 1
+
+    def stats(self):
+        return {
+            'pending': {kind: len(batch) for kind, batch in self._pending.items()},
+            'flushed': self.flushed,
+            'failures': self.failures,
+            'dropped': self.dropped,
+            'interval_seconds': self.interval,
+        }